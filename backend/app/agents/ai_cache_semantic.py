@@ -0,0 +1,131 @@
+import os
+import json
+import logging
+import threading
+from typing import Optional, List, Dict, Any
+import numpy as np
+
+from ..utils.file_utils import write_file_atomic
+
+try:
+    import faiss
+    faiss_available = True
+except ImportError:
+    faiss_available = False
+
+try:
+    from sentence_transformers import SentenceTransformer
+    sentence_transformers_available = True
+except ImportError:
+    sentence_transformers_available = False
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.hasHandlers():
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(handler)
+
+CACHE_DIR = "ai_cache"
+SEMANTIC_INDEX_FILE = os.path.join(CACHE_DIR, "semantic_cache.index")
+SEMANTIC_META_FILE = os.path.join(CACHE_DIR, "semantic_cache.json")
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+SIMILARITY_THRESHOLD = 0.95  # minimum cosine similarity to reuse cached insights
+SEARCH_TOP_K = 5  # neighbours checked so a hit generated with other settings can be skipped
+
+_encoder = None
+_index = None
+_entries: Optional[List[Dict[str, Any]]] = None
+# Routes run in a thread pool; the index, its entries and the files on disk change together
+_lock = threading.Lock()
+
+def is_available() -> bool:
+    return faiss_available and sentence_transformers_available
+
+def _get_encoder():
+    global _encoder
+    if _encoder is None:
+        _encoder = SentenceTransformer(EMBEDDING_MODEL)
+    return _encoder
+
+def _new_index():
+    return faiss.IndexFlatIP(_get_encoder().get_sentence_embedding_dimension())
+
+def _load_index() -> None:
+    """
+    Load the FAISS index and its insights sidecar from disk on first use.
+    Vectors are L2-normalised, so inner product on IndexFlatIP is cosine similarity.
+    """
+    global _index, _entries
+    if _index is not None:
+        return
+    if os.path.exists(SEMANTIC_INDEX_FILE) and os.path.exists(SEMANTIC_META_FILE):
+        try:
+            index = faiss.read_index(SEMANTIC_INDEX_FILE)
+            with open(SEMANTIC_META_FILE, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            if index.ntotal == len(entries):
+                _index, _entries = index, entries
+                return
+            logger.warning("Semantic cache index and metadata are out of sync; starting fresh.")
+        except Exception as e:
+            logger.error("Error loading semantic cache: %s", e)
+    _index = _new_index()
+    _entries = []
+
+def _save_index() -> None:
+    # Each file is replaced atomically; the metadata goes last, and a crash between the two
+    # leaves counts that disagree, which _load_index detects and discards
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    write_file_atomic(SEMANTIC_INDEX_FILE, faiss.serialize_index(_index).tobytes())
+    write_file_atomic(SEMANTIC_META_FILE, json.dumps(_entries).encode("utf-8"))
+
+def _embed(text: str) -> np.ndarray:
+    emb = _get_encoder().encode([text], normalize_embeddings=True)
+    return np.asarray(emb, dtype="float32")
+
+def lookup(text: str, settings: Dict[str, Any], threshold: float = SIMILARITY_THRESHOLD) -> Optional[str]:
+    """
+    Return cached insights for the nearest stored text generated with exactly these settings
+    (model, prompt version, generation options), if its cosine similarity exceeds threshold.
+    """
+    if not is_available():
+        return None
+    query = _embed(text)
+    with _lock:
+        _load_index()
+        if _index.ntotal == 0:
+            return None
+        scores, ids = _index.search(query, min(SEARCH_TOP_K, _index.ntotal))
+        for score, idx in zip(scores[0], ids[0]):
+            if idx < 0 or score <= threshold:
+                break
+            entry = _entries[idx]
+            if entry.get("settings") == settings:
+                logger.info("Semantic cache hit (similarity=%.4f).", score)
+                return entry["insights"]
+    return None
+
+def add(text: str, settings: Dict[str, Any], insights: str) -> None:
+    """
+    Store the text embedding and its insights under settings, then persist both to disk.
+    """
+    if not is_available():
+        return
+    vector = _embed(text)
+    with _lock:
+        _load_index()
+        _index.add(vector)
+        _entries.append({"settings": settings, "insights": insights})
+        _save_index()
+
+def clear() -> None:
+    """
+    Drop every semantic cache entry, in memory and on disk.
+    """
+    global _index, _entries
+    with _lock:
+        _index, _entries = None, None
+        for path in (SEMANTIC_INDEX_FILE, SEMANTIC_META_FILE):
+            if os.path.exists(path):
+                os.remove(path)
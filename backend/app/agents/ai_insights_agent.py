@@ -1,12 +1,24 @@
 import os
+import time
 import logging
-import subprocess
+import functools
 import hashlib
 import json
 import re
+from collections import OrderedDict
+from typing import Optional
 import ollama
 import pandas as pd
 
+from backend.app.agents import ai_cache_semantic
+from backend.app.utils.file_utils import write_file_atomic
+
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson_available = False
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 if not logger.hasHandlers():
@@ -16,32 +28,92 @@ if not logger.hasHandlers():
 
 AVAILABLE_MODELS = ["mistral", "gemma2", "llama3.3", "llama2", "gpt-4"]
 CACHE_DIR = "ai_cache"
+MODEL_LIST_TTL = 60  # seconds before the local Ollama model list is re-queried
+MEM_CACHE_MAX = 256  # insights kept in memory in front of the on-disk cache
+PROMPT_VERSION = "v1"  # bump when the prompt template changes to invalidate every cached insight
 os.makedirs(CACHE_DIR, exist_ok=True)
 
+_CLEAN_RE = re.compile(r'\[/?[A-Z_]+\]|</s>')
+_WS_RE = re.compile(r'\s+')
+
+_INSIGHT_MEM_CACHE: "OrderedDict[str, str]" = OrderedDict()
+
+def _mem_cache_get(key: str) -> Optional[str]:
+    insights = _INSIGHT_MEM_CACHE.get(key)
+    if insights is not None:
+        _INSIGHT_MEM_CACHE.move_to_end(key)
+    return insights
+
+def _mem_cache_put(key: str, insights: str) -> None:
+    _INSIGHT_MEM_CACHE[key] = insights
+    _INSIGHT_MEM_CACHE.move_to_end(key)
+    while len(_INSIGHT_MEM_CACHE) > MEM_CACHE_MAX:
+        _INSIGHT_MEM_CACHE.popitem(last=False)
+
+def _write_cache_file(cache_file: str, payload: dict) -> None:
+    """
+    Serialize the payload in one call and atomically replace the cache file,
+    so a crash mid-write never leaves a truncated entry behind.
+    """
+    data = orjson.dumps(payload) if orjson_available else json.dumps(payload).encode("utf-8")
+    write_file_atomic(cache_file, data)
+
+def build_cache_key(
+    eda_summary: str,
+    model_summary: str,
+    model_choice: str,
+    enable_cot: bool,
+    max_tokens: int,
+    chunk_threshold: int
+) -> str:
+    """
+    Build the cache key from the user content and generation settings only,
+    so the prompt template is versioned through PROMPT_VERSION instead of hashed.
+    """
+    return json.dumps({
+        "v": PROMPT_VERSION,
+        "m": model_choice,
+        "cot": enable_cot,
+        "mt": max_tokens,
+        "ct": chunk_threshold,
+        "eda": eda_summary,
+        "ms": model_summary,
+    }, sort_keys=True)
+
 def get_cache_filename(prompt: str, model_choice: str) -> str:
     try:
         key = f"{model_choice}:{prompt}"
-        hash_key = hashlib.md5(key.encode()).hexdigest()
+        hash_key = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
         return os.path.join(CACHE_DIR, f"{hash_key}.json")
     except Exception as e:
         logger.exception("Error generating cache filename")
         raise e
 
+@functools.lru_cache(maxsize=1)
+def _available_models(ttl_bucket: int) -> frozenset:
+    """
+    Query the local Ollama server once per TTL bucket and return the installed model names,
+    both as full tags (e.g. 'mistral:latest') and as base names (e.g. 'mistral').
+    """
+    response = ollama.list()
+    names = set()
+    for m in response["models"]:
+        full_name = (m["model"] or "").lower()
+        names.add(full_name)
+        names.add(full_name.split(":")[0])
+    return frozenset(names)
+
 def is_model_available(model_name: str) -> bool:
     try:
-        output = subprocess.run(["ollama", "list"], capture_output=True, text=True)
-        available_models = output.stdout.lower()
-        return model_name.lower() in available_models
+        ttl_bucket = int(time.monotonic() // MODEL_LIST_TTL)
+        return model_name.lower() in _available_models(ttl_bucket)
     except Exception as e:
         logger.exception("Error checking model availability")
         return False
 
 def clean_response(raw_response: str) -> str:
     try:
-        cleaned = re.sub(r'\[/?[A-Z_]+\]', '', raw_response)
-        cleaned = re.sub(r'</s>', '', cleaned)
-        cleaned = re.sub(r'\s+', ' ', cleaned)
-        return cleaned.strip()
+        return _WS_RE.sub(' ', _CLEAN_RE.sub('', raw_response)).strip()
     except Exception as e:
         logger.exception("Error cleaning AI model response")
         raise e
@@ -54,11 +126,15 @@ def generate_ai_insights(
     force_regenerate: bool = False,
     enable_cot: bool = False,
     max_tokens: int = 512,
-    clear_cache: bool = False
+    clear_cache: bool = False,
+    enable_semantic_cache: bool = False
 ) -> str:
     """
     Generate AI insights based on provided EDA and model training summaries.
-    If force_regenerate or clear_cache is True, any existing cache file is removed.
+    If force_regenerate or clear_cache is True, any existing cache file is removed;
+    clear_cache also empties the semantic cache.
+    If enable_semantic_cache is True, an exact-cache miss falls back to insights stored
+    for near-identical summaries generated with the same settings (see ai_cache_semantic).
     """
     try:
         if model_choice not in AVAILABLE_MODELS:
@@ -93,10 +169,33 @@ def generate_ai_insights(
         
         logger.info("Generated prompt: %s", prompt)
         
-        cache_file = get_cache_filename(prompt, model_choice)
-        if (force_regenerate or clear_cache) and os.path.exists(cache_file):
-            logger.info("Force regenerate/clear cache enabled. Removing cache file.")
-            os.remove(cache_file)
+        cache_key = build_cache_key(eda_summary, model_summary, model_choice, enable_cot, max_tokens, chunk_threshold)
+        cache_file = get_cache_filename(cache_key, model_choice)
+        mem_key = os.path.splitext(os.path.basename(cache_file))[0]
+        # Near-duplicate lookups only reuse insights generated with the same settings
+        semantic_text = f"{eda_summary}\n\n{model_summary}"
+        semantic_settings = {
+            "v": PROMPT_VERSION,
+            "model": model_choice,
+            "cot": enable_cot,
+            "mt": max_tokens,
+            "ct": chunk_threshold,
+        }
+        if force_regenerate or clear_cache:
+            _INSIGHT_MEM_CACHE.pop(mem_key, None)
+            if os.path.exists(cache_file):
+                logger.info("Force regenerate/clear cache enabled. Removing cache file.")
+                os.remove(cache_file)
+        if clear_cache:
+            try:
+                ai_cache_semantic.clear()
+            except Exception as semantic_e:
+                logger.error("Error clearing semantic cache: %s", semantic_e)
+        if not force_regenerate:
+            cached_insights = _mem_cache_get(mem_key)
+            if cached_insights:
+                logger.info("Using in-memory cached insights.")
+                return cached_insights
         if not force_regenerate and os.path.exists(cache_file):
             logger.info("Loading AI insights from cache.")
             try:
@@ -105,11 +204,21 @@ def generate_ai_insights(
                     cached_insights = cached_response.get("insights", "").strip()
                     if cached_insights:
                         logger.info("Using cached insights.")
+                        _mem_cache_put(mem_key, cached_insights)
                         return cached_insights
                     else:
                         logger.info("Cached insights empty; regenerating.")
             except Exception as cache_e:
                 logger.error("Error reading cache file: %s", cache_e)
+        if enable_semantic_cache and not force_regenerate:
+            try:
+                similar_insights = ai_cache_semantic.lookup(semantic_text, semantic_settings)
+                if similar_insights:
+                    logger.info("Using semantically cached insights.")
+                    _mem_cache_put(mem_key, similar_insights)
+                    return similar_insights
+            except Exception as semantic_e:
+                logger.error("Error reading semantic cache: %s", semantic_e)
         
         try:
             response = ollama.chat(
@@ -160,12 +269,17 @@ def generate_ai_insights(
         
         insights = insights.strip()
         if insights:
+            _mem_cache_put(mem_key, insights)
             try:
-                with open(cache_file, "w", encoding="utf-8") as f:
-                    json.dump({"insights": insights}, f)
+                _write_cache_file(cache_file, {"insights": insights})
                 logger.info("Cached new AI insights.")
             except Exception as save_cache_e:
                 logger.error("Error saving cache file: %s", save_cache_e)
+            if enable_semantic_cache:
+                try:
+                    ai_cache_semantic.add(semantic_text, semantic_settings, insights)
+                except Exception as semantic_e:
+                    logger.error("Error saving semantic cache: %s", semantic_e)
         else:
             logger.warning("AI model returned empty insights; not caching.")
         
@@ -188,10 +302,13 @@ def get_model_summary(report_path: str) -> str:
     try:
         if not os.path.exists(report_path):
             raise FileNotFoundError(f"No model training report found at {report_path}.")
-        df = pd.read_csv(report_path)
+        try:
+            df = pd.read_csv(report_path, nrows=5)
+        except pd.errors.EmptyDataError:
+            df = pd.DataFrame()
         if df.empty:
             raise ValueError(f"Training results CSV is empty at {report_path}.")
-        summary = df.head().to_string(index=False)
+        summary = df.to_string(index=False)
         return f"Model Training Results:\n\n{summary}"
     except Exception as e:
         logger.exception("Error reading model training summary")
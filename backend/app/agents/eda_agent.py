@@ -1,33 +1,91 @@
 import os
+import io
 import logging
+from pathlib import Path
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
-from typing import Dict, Tuple, List, Optional, Any
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Tuple, List, Optional, Any, Callable
+
+from ..utils.figure_pool import FIGURE_POOL_WORKERS, get_figure_pool, shutdown_figure_pool
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def sample_df(df: pd.DataFrame, sample_size: Optional[int] = 100000) -> pd.DataFrame:
+PARALLEL_PLOT_MIN_COLS = 4  # below this, shipping column data to the pool costs more than it saves
+COUNTPLOT_MAX_CATEGORIES = 50  # categories beyond the most frequent N are folded into "Other"
+
+# Fewer, simplified path segments per figure when rendering dense plots
+plt.rcParams["agg.path.chunksize"] = 10000
+plt.rcParams["path.simplify_threshold"] = 1.0
+
+def _save_figure(fig: plt.Figure, save_path: str) -> None:
+    """
+    Renders the figure to an in-memory PNG and writes it to disk in a single call.
+    """
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight")
+    Path(save_path).write_bytes(buf.getbuffer())
+
+def sample_df(df: pd.DataFrame, sample_size: Optional[int] = 100000, random: bool = False) -> pd.DataFrame:
     """
     Returns a sample of the DataFrame if its size exceeds sample_size.
+    By default rows are taken at evenly spaced positions across the whole frame, which is
+    deterministic and avoids permuting the index; pass random=True for a seeded random sample.
     """
     if sample_size is not None and len(df) > sample_size:
         logging.info(f"Dataset has {len(df)} rows; sampling {sample_size} rows for EDA.")
-        return df.sample(n=sample_size, random_state=42)
+        if random:
+            return df.sample(n=sample_size, random_state=42)
+        return df.iloc[np.linspace(0, len(df) - 1, sample_size).astype(np.int64)]
     return df
 
+def _skew_kurtosis(arr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes bias-corrected skewness and excess kurtosis for every column of a 2D float array
+    in one pass over the central moments. Matches pandas' skew()/kurtosis(), ignoring NaNs.
+    """
+    n = np.sum(~np.isnan(arr), axis=0).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dev = arr - np.nansum(arr, axis=0) / n
+        dev2 = dev ** 2
+        m2 = np.nansum(dev2, axis=0)
+        m3 = np.nansum(dev2 * dev, axis=0)
+        m4 = np.nansum(dev2 ** 2, axis=0)
+        m2 = np.where(np.abs(m2) < 1e-14, 0.0, m2)
+        skew = (n * (n - 1) ** 0.5 / (n - 2)) * (m3 / m2 ** 1.5)
+        kurt = (
+            n * (n + 1) * (n - 1) * m4 / ((n - 2) * (n - 3) * m2 ** 2)
+            - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+        )
+    skew = np.where(m2 == 0, 0.0, skew)
+    kurt = np.where(m2 == 0, 0.0, kurt)
+    skew[n < 3] = np.nan
+    kurt[n < 4] = np.nan
+    return skew, kurt
+
 def generate_eda_tables(
     df: pd.DataFrame,
     exclude_date_features: bool = True,
     correlation_method: str = "pearson",
-    sample_size: Optional[int] = 100000
+    sample_size: Optional[int] = 100000,
+    df_sample: Optional[pd.DataFrame] = None,
+    numeric_cols: Optional[List[str]] = None,
+    n_rows: Optional[int] = None,
+    missing_counts: Optional[pd.Series] = None
 ) -> Dict[str, pd.DataFrame]:
     """
     Generates summary tables for EDA: overview, data types, missing values, and descriptive stats.
+    A precomputed df_sample / numeric_cols can be passed to skip re-sampling and dtype scans.
+    When df is itself a sample, n_rows / missing_counts give the full dataset's totals.
     """
     # Overview table
-    overview_df = pd.DataFrame({"Metric": ["Shape"], "Value": [str(df.shape)]})
+    shape = (n_rows, df.shape[1]) if n_rows is not None else df.shape
+    overview_df = pd.DataFrame({"Metric": ["Shape"], "Value": [str(shape)]})
 
     # Data types table
     dtypes_df = (
@@ -40,8 +98,15 @@ def generate_eda_tables(
         mask = dtypes_df["Column"].str.lower().str.startswith("date_")
         dtypes_df = dtypes_df[~mask]
 
-    # Missing values table
-    missing_series = df.isnull().sum()
+    # Missing values table (counted column by column to avoid a full-frame boolean mask)
+    if missing_counts is not None:
+        missing_series = missing_counts.reindex(df.columns, fill_value=0).astype("int64")
+    else:
+        missing_series = pd.Series(
+            [int(df.iloc[:, i].isna().sum()) for i in range(df.shape[1])],
+            index=df.columns,
+            dtype="int64"
+        )
     missing_df = (
         missing_series[missing_series > 0]
         .reset_index()
@@ -51,7 +116,8 @@ def generate_eda_tables(
         missing_df = pd.DataFrame({"Column": ["No missing values found."], "Missing Values": [""]})
 
     # Descriptive statistics table
-    df_sample = sample_df(df, sample_size)
+    if df_sample is None:
+        df_sample = sample_df(df, sample_size)
     if exclude_date_features:
         cols = [c for c in df_sample.columns if not c.lower().startswith("date_")]
         desc_df = df_sample[cols].describe(include="all").T.reset_index().rename(columns={"index": "Feature"})
@@ -59,12 +125,15 @@ def generate_eda_tables(
         desc_df = df_sample.describe(include="all").T.reset_index().rename(columns={"index": "Feature"})
 
     # Adding skewness and kurtosis for numeric columns
-    numeric_cols = df_sample.select_dtypes(include=[np.number]).columns.tolist()
+    if numeric_cols is None:
+        numeric_cols = df_sample.select_dtypes(include=[np.number]).columns.tolist()
     if numeric_cols:
-        skewness = df_sample[numeric_cols].skew()
-        kurtosis = df_sample[numeric_cols].kurtosis()
-        desc_df['Skewness'] = desc_df['Feature'].apply(lambda x: round(skewness.get(x, np.nan), 4))
-        desc_df['Kurtosis'] = desc_df['Feature'].apply(lambda x: round(kurtosis.get(x, np.nan), 4))
+        arr = df_sample[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        skew_values, kurt_values = _skew_kurtosis(arr)
+        skewness = pd.Series(skew_values, index=numeric_cols)
+        kurtosis = pd.Series(kurt_values, index=numeric_cols)
+        desc_df['Skewness'] = desc_df['Feature'].map(skewness).round(4)
+        desc_df['Kurtosis'] = desc_df['Feature'].map(kurtosis).round(4)
 
     tables = {
         "Overview": overview_df,
@@ -74,90 +143,156 @@ def generate_eda_tables(
     }
     return tables
 
-def generate_missing_values_heatmap(df: pd.DataFrame, save_path: Optional[str] = None) -> plt.Figure:
+def generate_missing_values_heatmap(
+    df: pd.DataFrame,
+    save_path: Optional[str] = None,
+    max_rows: int = 2000
+) -> plt.Figure:
     """
     Generates a heatmap of missing values and saves it if a save path is provided.
+    Frames taller than max_rows are binned into max_rows row blocks showing the fraction missing.
     """
-    plt.figure(figsize=(10, 6))
-    sns.heatmap(df.isnull(), cbar=False, cmap="viridis")
-    plt.title("Missing Values Heatmap")
-    fig = plt.gcf()
+    mask = df.isna()
+    if len(mask) > max_rows:
+        bounds = np.linspace(0, len(mask), max_rows + 1, dtype=np.int64)[:-1]
+        counts = np.diff(np.append(bounds, len(mask)))
+        binned = np.add.reduceat(mask.to_numpy(dtype=np.float32), bounds, axis=0) / counts[:, None]
+        mask = pd.DataFrame(binned, columns=df.columns)
+        logging.info(f"Missing values heatmap binned from {len(df)} to {max_rows} rows.")
+    # Figures are built with the object-oriented API so pyplot never tracks (and leaks) them
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    sns.heatmap(mask, cbar=False, cmap="viridis", ax=ax)
+    ax.set_title("Missing Values Heatmap")
     if save_path:
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        fig.savefig(save_path, bbox_inches="tight")
+        _save_figure(fig, save_path)
         logging.info(f"Missing values heatmap saved at {save_path}")
     return fig
 
+def _render_png(fig: plt.Figure) -> bytes:
+    """
+    Renders the figure to PNG bytes. Deflate dominates encoding time for small plots;
+    level 1 is much faster at a slightly larger size.
+    """
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", pil_kwargs={"compress_level": 1})
+    return buf.getvalue()
+
+def _plot_numeric_column(col: str, values: np.ndarray, save_dir: Optional[str]) -> bytes:
+    fig = Figure()
+    ax = fig.subplots()
+    sns.histplot(values, kde=True, bins=30, ax=ax)
+    ax.set_title(f"Distribution of {col}")
+    ax.set_xlabel(col)
+    ax.set_ylabel("Frequency")
+    png = _render_png(fig)
+    if save_dir:
+        Path(save_dir, f"{col}_distribution.png").write_bytes(png)
+    return png
+
+def _plot_categorical_column(col: str, counts: pd.Series, save_dir: Optional[str]) -> bytes:
+    fig = Figure()
+    ax = fig.subplots()
+    ax.bar(counts.index.astype(str), counts.to_numpy())
+    ax.set_title(f"Count Plot of {col}")
+    ax.set_xlabel(col)
+    ax.set_ylabel("Count")
+    png = _render_png(fig)
+    if save_dir:
+        Path(save_dir, f"{col}_countplot.png").write_bytes(png)
+    return png
+
+def _render_column_plots(
+    plot_func: Callable[[str, Any, Optional[str]], bytes],
+    items: List[Tuple[str, Any]],
+    save_dir: Optional[str],
+    n_jobs: Optional[int]
+) -> Dict[str, bytes]:
+    """
+    Renders one PNG per column, in the shared figure pool when there are enough columns
+    (n_jobs=1 always renders in process). Workers receive only the column data and
+    return the finished PNG bytes, so each figure is rendered exactly once.
+    """
+    if save_dir:
+        os.makedirs(save_dir, exist_ok=True)
+    if n_jobs != 1 and FIGURE_POOL_WORKERS > 0 and len(items) >= PARALLEL_PLOT_MIN_COLS:
+        try:
+            pool = get_figure_pool()
+            futures = {col: pool.submit(plot_func, col, data, save_dir) for col, data in items}
+            return {col: future.result() for col, future in futures.items()}
+        except BrokenProcessPool as e:
+            # A crashed worker breaks the pool; replace it next time and render this batch here
+            logging.warning(f"Figure pool failed ({e}); rendering in process.")
+            shutdown_figure_pool()
+    return {col: plot_func(col, data, save_dir) for col, data in items}
+
 def generate_numeric_distribution_plots(
     df: pd.DataFrame,
     save_dir: Optional[str] = None,
     exclude_date_features: bool = True,
-    sample_size: Optional[int] = 100000
-) -> Dict[str, plt.Figure]:
+    sample_size: Optional[int] = 100000,
+    n_jobs: Optional[int] = None,
+    df_sample: Optional[pd.DataFrame] = None,
+    numeric_cols: Optional[List[str]] = None
+) -> Dict[str, bytes]:
     """
-    Generates histograms with KDE for numeric columns.
+    Generates histograms with KDE for numeric columns, returned as PNG bytes per column.
     """
-    plots = {}
-    df_sample = sample_df(df, sample_size)
-    numeric_cols = df_sample.select_dtypes(include=[np.number]).columns.tolist()
+    if df_sample is None:
+        df_sample = sample_df(df, sample_size)
+    if numeric_cols is None:
+        numeric_cols = df_sample.select_dtypes(include=[np.number]).columns.tolist()
     if exclude_date_features:
         numeric_cols = [c for c in numeric_cols if not c.lower().startswith("date_")]
-
-    for col in numeric_cols:
-        plt.figure()
-        sns.histplot(df_sample[col].dropna(), kde=True, bins=30)
-        plt.title(f"Distribution of {col}")
-        plt.xlabel(col)
-        plt.ylabel("Frequency")
-        fig = plt.gcf()
-        plots[col] = fig
-        if save_dir:
-            os.makedirs(save_dir, exist_ok=True)
-            fig.savefig(os.path.join(save_dir, f"{col}_distribution.png"), bbox_inches="tight")
-        plt.close(fig)
-    return plots
+    items = [(col, df_sample[col].dropna().to_numpy()) for col in numeric_cols]
+    return _render_column_plots(_plot_numeric_column, items, save_dir, n_jobs)
 
 def generate_categorical_count_plots(
     df: pd.DataFrame,
     save_dir: Optional[str] = None,
     exclude_date_features: bool = True,
-    sample_size: Optional[int] = 100000
-) -> Dict[str, plt.Figure]:
+    sample_size: Optional[int] = 100000,
+    n_jobs: Optional[int] = None,
+    df_sample: Optional[pd.DataFrame] = None,
+    cat_cols: Optional[List[str]] = None
+) -> Dict[str, bytes]:
     """
-    Generates count plots for categorical columns.
+    Generates count plots for categorical columns, returned as PNG bytes per column.
     """
-    plots = {}
-    df_sample = sample_df(df, sample_size)
-    cat_cols = df_sample.select_dtypes(include=["object", "category"]).columns.tolist()
+    if df_sample is None:
+        df_sample = sample_df(df, sample_size)
+    if cat_cols is None:
+        cat_cols = df_sample.select_dtypes(include=["object", "category"]).columns.tolist()
     if exclude_date_features:
         cat_cols = [c for c in cat_cols if not c.lower().startswith("date_")]
-
+    # Counts are computed once here, so workers receive only the (truncated) counts rather than the column
+    items = []
     for col in cat_cols:
-        plt.figure()
-        sns.countplot(data=df_sample, x=col, order=df_sample[col].value_counts().index)
-        plt.title(f"Count Plot of {col}")
-        plt.xlabel(col)
-        plt.ylabel("Count")
-        fig = plt.gcf()
-        plots[col] = fig
-        if save_dir:
-            os.makedirs(save_dir, exist_ok=True)
-            fig.savefig(os.path.join(save_dir, f"{col}_countplot.png"), bbox_inches="tight")
-        plt.close(fig)
-    return plots
+        counts = df_sample[col].value_counts()
+        if len(counts) > COUNTPLOT_MAX_CATEGORIES:
+            other = counts.iloc[COUNTPLOT_MAX_CATEGORIES:].sum()
+            counts = counts.head(COUNTPLOT_MAX_CATEGORIES)
+            counts = pd.concat([counts, pd.Series({"Other": other})])
+        items.append((col, counts))
+    return _render_column_plots(_plot_categorical_column, items, save_dir, n_jobs)
 
 def generate_pairplot(
     df: pd.DataFrame,
     save_path: Optional[str] = None,
     exclude_date_features: bool = True,
     max_numeric_cols: int = 8,
-    sample_size: Optional[int] = 100000
+    sample_size: Optional[int] = 100000,
+    df_sample: Optional[pd.DataFrame] = None,
+    numeric_cols: Optional[List[str]] = None
 ) -> Optional[plt.Figure]:
     """
     Generates a pairplot for a subset of numeric columns.
     """
-    df_sample = sample_df(df, sample_size)
-    numeric_cols = df_sample.select_dtypes(include=[np.number]).columns.tolist()
+    if df_sample is None:
+        df_sample = sample_df(df, sample_size)
+    if numeric_cols is None:
+        numeric_cols = df_sample.select_dtypes(include=[np.number]).columns.tolist()
     if exclude_date_features:
         numeric_cols = [c for c in numeric_cols if not c.lower().startswith("date_")]
     if len(numeric_cols) < 2:
@@ -166,17 +301,38 @@ def generate_pairplot(
     if len(numeric_cols) > max_numeric_cols:
         numeric_cols = numeric_cols[:max_numeric_cols]
         logging.info(f"Using first {max_numeric_cols} numeric columns for pairplot.")
-    pairplot_fig = sns.pairplot(df_sample[numeric_cols].dropna())
-    fig = pairplot_fig.fig
+    data = df_sample[numeric_cols].dropna()
+    k = len(numeric_cols)
+    fig = Figure(figsize=(2.5 * k, 2.5 * k))
+    axes = fig.subplots(k, k, squeeze=False)
+    # Histograms on the diagonal, hexbin density tiles elsewhere: binning is done in C,
+    # so the cost no longer scales with one marker per sampled row per tile.
+    for i, row_col in enumerate(numeric_cols):
+        y = data[row_col].to_numpy()
+        for j, col_col in enumerate(numeric_cols):
+            ax = axes[i, j]
+            if i == j:
+                ax.hist(y, bins=30)
+            else:
+                ax.hexbin(data[col_col].to_numpy(), y, gridsize=50, cmap="viridis", mincnt=1)
+            if i == k - 1:
+                ax.set_xlabel(col_col)
+            else:
+                ax.tick_params(labelbottom=False)
+            if j == 0:
+                ax.set_ylabel(row_col)
+            else:
+                ax.tick_params(labelleft=False)
+    fig.tight_layout()
     if save_path:
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        fig.savefig(save_path, bbox_inches="tight")
-    plt.close(fig)
+        _save_figure(fig, save_path)
     return fig
 
 def generate_interactive_correlation_heatmap(
     df: pd.DataFrame,
-    method: str = "pearson"
+    method: str = "pearson",
+    numeric_cols: Optional[List[str]] = None
 ) -> Optional[Any]:
     """
     Generates an interactive correlation heatmap using Plotly.
@@ -186,7 +342,10 @@ def generate_interactive_correlation_heatmap(
     except ImportError:
         logging.warning("Plotly not installed, skipping interactive correlation heatmap.")
         return None
-    numeric_df = df.select_dtypes(include=[np.number])
+    if numeric_cols is None:
+        numeric_df = df.select_dtypes(include=[np.number])
+    else:
+        numeric_df = df[numeric_cols]
     if numeric_df.shape[1] < 2:
         logging.info("Not enough numeric columns for correlation heatmap.")
         return None
@@ -203,7 +362,9 @@ def generate_interactive_correlation_heatmap(
 
 def generate_interactive_scatter_matrix(
     df: pd.DataFrame,
-    sample_size: Optional[int] = 100000
+    sample_size: Optional[int] = 100000,
+    df_sample: Optional[pd.DataFrame] = None,
+    numeric_cols: Optional[List[str]] = None
 ) -> Optional[Any]:
     """
     Generates an interactive scatter matrix using Plotly.
@@ -213,8 +374,10 @@ def generate_interactive_scatter_matrix(
     except ImportError:
         logging.warning("Plotly not installed, skipping scatter matrix.")
         return None
-    df_sample = sample_df(df, sample_size)
-    numeric_cols = df_sample.select_dtypes(include=[np.number]).columns.tolist()
+    if df_sample is None:
+        df_sample = sample_df(df, sample_size)
+    if numeric_cols is None:
+        numeric_cols = df_sample.select_dtypes(include=[np.number]).columns.tolist()
     if len(numeric_cols) < 2:
         logging.info("Not enough numeric columns for scatter matrix.")
         return None
@@ -231,7 +394,11 @@ def save_eda_report_tables(
     report_path: Optional[str] = None,
     exclude_date_features: bool = True,
     correlation_method: str = "pearson",
-    sample_size: Optional[int] = 100000
+    sample_size: Optional[int] = 100000,
+    df_sample: Optional[pd.DataFrame] = None,
+    numeric_cols: Optional[List[str]] = None,
+    n_rows: Optional[int] = None,
+    missing_counts: Optional[pd.Series] = None
 ) -> Tuple[str, Dict[str, pd.DataFrame]]:
     """
     Generates EDA tables and a textual summary report, then saves the report.
@@ -241,7 +408,16 @@ def save_eda_report_tables(
     elif not report_path:
         report_path = "reports/eda_report.txt"
 
-    tables = generate_eda_tables(df, exclude_date_features, correlation_method, sample_size)
+    tables = generate_eda_tables(
+        df,
+        exclude_date_features,
+        correlation_method,
+        sample_size,
+        df_sample=df_sample,
+        numeric_cols=numeric_cols,
+        n_rows=n_rows,
+        missing_counts=missing_counts
+    )
     report_lines = [
         "### Exploratory Data Analysis Summary\n",
         "Overview of dataset size, structure, and key characteristics.",
@@ -263,23 +439,43 @@ def generate_visualizations(
     save_dir: str = "reports/figures",
     exclude_date_features: bool = True,
     sample_size: Optional[int] = 100000,
-    max_numeric_cols: int = 8
+    max_numeric_cols: int = 8,
+    df_sample: Optional[pd.DataFrame] = None,
+    numeric_cols: Optional[List[str]] = None,
+    cat_cols: Optional[List[str]] = None
 ) -> Dict[str, Any]:
     """
     Generates a collection of static and interactive visualizations.
+    The sample and column lists are computed once here and shared by every plot.
     """
     visuals = {}
+    if df_sample is None:
+        df_sample = sample_df(df, sample_size)
+    if numeric_cols is None:
+        numeric_cols = df_sample.select_dtypes(include=[np.number]).columns.tolist()
+    if cat_cols is None:
+        cat_cols = df_sample.select_dtypes(include=["object", "category"]).columns.tolist()
     os.makedirs(save_dir, exist_ok=True)
     visuals["missing_values_heatmap"] = generate_missing_values_heatmap(
         df, save_path=os.path.join(save_dir, "missing_values_heatmap.png")
     )
     numeric_dists = generate_numeric_distribution_plots(
-        df, save_dir=save_dir, exclude_date_features=exclude_date_features, sample_size=sample_size
+        df,
+        save_dir=save_dir,
+        exclude_date_features=exclude_date_features,
+        sample_size=sample_size,
+        df_sample=df_sample,
+        numeric_cols=numeric_cols
     )
     for col, fig in numeric_dists.items():
         visuals[f"numeric_dist__{col}"] = fig
     cat_counts = generate_categorical_count_plots(
-        df, save_dir=save_dir, exclude_date_features=exclude_date_features, sample_size=sample_size
+        df,
+        save_dir=save_dir,
+        exclude_date_features=exclude_date_features,
+        sample_size=sample_size,
+        df_sample=df_sample,
+        cat_cols=cat_cols
     )
     for col, fig in cat_counts.items():
         visuals[f"categorical_count__{col}"] = fig
@@ -288,11 +484,15 @@ def generate_visualizations(
         save_path=os.path.join(save_dir, "pairplot.png"),
         exclude_date_features=exclude_date_features,
         max_numeric_cols=max_numeric_cols,
-        sample_size=sample_size
+        sample_size=sample_size,
+        df_sample=df_sample,
+        numeric_cols=numeric_cols
     )
     if pairplot_fig is not None:
         visuals["pairplot"] = pairplot_fig
-    scatter_fig = generate_interactive_scatter_matrix(df, sample_size)
+    scatter_fig = generate_interactive_scatter_matrix(
+        df, sample_size, df_sample=df_sample, numeric_cols=numeric_cols
+    )
     if scatter_fig is not None:
         visuals["interactive_scatter_matrix"] = scatter_fig
     return visuals
@@ -304,22 +504,32 @@ def generate_eda(
     correlation_method: str = "pearson",
     interactive: bool = True,
     sample_size: Optional[int] = 100000,
-    max_numeric_cols: int = 8
+    max_numeric_cols: int = 8,
+    n_rows: Optional[int] = None,
+    missing_counts: Optional[pd.Series] = None
 ) -> Tuple[str, Dict[str, pd.DataFrame], Dict[str, Any]]:
     """
     Runs the full EDA pipeline: creates a report, summary tables, and visualizations.
+    If df is a sample (see file_utils.read_csv_sample), n_rows / missing_counts are the full file's.
     """
     logging.info("Starting EDA pipeline...")
+    df_sample = sample_df(df, sample_size)
+    numeric_cols = df_sample.select_dtypes(include=[np.number]).columns.tolist()
+    cat_cols = df_sample.select_dtypes(include=["object", "category"]).columns.tolist()
     report_text, tables = save_eda_report_tables(
         df,
         dataset_id=dataset_id,
         exclude_date_features=exclude_date_features,
         correlation_method=correlation_method,
-        sample_size=sample_size
+        sample_size=sample_size,
+        df_sample=df_sample,
+        numeric_cols=numeric_cols,
+        n_rows=n_rows,
+        missing_counts=missing_counts
     )
     interactive_figs = {}
     if interactive:
-        corr_heatmap = generate_interactive_correlation_heatmap(df, correlation_method)
+        corr_heatmap = generate_interactive_correlation_heatmap(df, correlation_method, numeric_cols=numeric_cols)
         if corr_heatmap is not None:
             interactive_figs["correlation_heatmap"] = corr_heatmap
     static_visuals = generate_visualizations(
@@ -327,7 +537,10 @@ def generate_eda(
         save_dir="reports/figures",
         exclude_date_features=exclude_date_features,
         sample_size=sample_size,
-        max_numeric_cols=max_numeric_cols
+        max_numeric_cols=max_numeric_cols,
+        df_sample=df_sample,
+        numeric_cols=numeric_cols,
+        cat_cols=cat_cols
     )
     all_figures = {**interactive_figs, **static_visuals}
     logging.info("EDA pipeline complete.")
@@ -1,9 +1,11 @@
 import os
+import threading
 import joblib
 import numpy as np
 import pandas as pd
 import logging
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
 from sklearn.metrics import accuracy_score, f1_score, mean_squared_error, r2_score
 from sklearn.base import is_classifier, is_regressor
 
@@ -14,58 +16,97 @@ if not logger.hasHandlers():
     handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
     logger.addHandler(handler)
 
+MODEL_CACHE_MAX_ENTRIES = 8  # least recently used models are dropped beyond this
+
+# Loaded models keyed by (path, mtime_ns) so a re-saved file is picked up on the next call
+_MODEL_CACHE: "OrderedDict[Tuple[str, int], Any]" = OrderedDict()
+_MODEL_CACHE_LOCK = threading.Lock()
+
+def load_model_cached(model_path: str) -> Any:
+    """
+    Load a joblib model, reusing the in-memory copy while the file is unchanged.
+    Numpy arrays inside the pickle are memory-mapped rather than copied into RAM.
+    """
+    key = (model_path, os.stat(model_path).st_mtime_ns)
+    with _MODEL_CACHE_LOCK:
+        model = _MODEL_CACHE.get(key)
+        if model is not None:
+            _MODEL_CACHE.move_to_end(key)
+            return model
+    model = joblib.load(model_path, mmap_mode="r")
+    # Routes run in a thread pool, so the cache is only mutated under the lock
+    with _MODEL_CACHE_LOCK:
+        # Drop stale entries for an older version of the same file
+        for stale_key in [k for k in _MODEL_CACHE if k[0] == model_path and k != key]:
+            del _MODEL_CACHE[stale_key]
+        _MODEL_CACHE[key] = model
+        while len(_MODEL_CACHE) > MODEL_CACHE_MAX_ENTRIES:
+            _MODEL_CACHE.popitem(last=False)
+    return model
+
 def evaluate_model(new_df: pd.DataFrame, model_path: str, target_col: Optional[str] = None) -> Dict[str, Any]:
     """
     Load a saved model from 'model_path' and evaluate it on new_df.
     If a target column is provided and exists in new_df, compute standard metrics.
     
-    Returns a dictionary with predictions, evaluation metrics, and actual values (if available).
+    Returns a dictionary with predictions, evaluation metrics, and actual values (if available)
+    as numpy arrays.
     Also includes information about any column mismatches.
     """
     try:
-        model = joblib.load(model_path)
+        model = load_model_cached(model_path)
         logger.info(f"Loaded model from {model_path}")
     except Exception as e:
         logger.error(f"Failed to load model from {model_path}: {e}")
         raise e
 
-    df = new_df.copy()
+    # Work on new_df directly; only drop the target when present, which builds a new frame
+    df = new_df
     y_true = None
     col_info = {}
     if target_col:
         if target_col in df.columns:
-            y_true = df[target_col].copy()
-            df.drop(columns=[target_col], inplace=True)
+            y_true = new_df[target_col]
+            df = new_df.drop(columns=[target_col])
         else:
             logger.warning(f"Target column '{target_col}' not found in evaluation data; metrics computation will be skipped.")
             col_info["missing_target"] = target_col
 
-    # Align evaluation data with training columns
-    if hasattr(model, "_training_columns"):
-        training_cols = set(model._training_columns)
-        current_cols = set(df.columns)
-        extra_cols = list(current_cols - training_cols)
-        missing_cols = list(training_cols - current_cols)
-        if extra_cols:
-            logger.warning(f"Extra columns detected in evaluation data that will be dropped: {extra_cols}")
-            col_info["extra_columns_dropped"] = extra_cols
-            df.drop(columns=extra_cols, inplace=True)
+    # Align evaluation data with training columns: sklearn's feature_names_in_ for models
+    # fitted on a DataFrame, otherwise the _training_columns recorded at training time
+    training_cols = getattr(model, "feature_names_in_", None)
+    if training_cols is None:
+        training_cols = getattr(model, "_training_columns", None)
+    if training_cols is not None:
+        training_cols = pd.Index(training_cols)
+        extra_cols = df.columns.difference(training_cols, sort=False).tolist()
+        missing_cols = training_cols.difference(df.columns, sort=False).tolist()
         if missing_cols:
             msg = f"Missing expected columns from training: {missing_cols}. Please check your dataset."
             logger.error(msg)
             raise ValueError(msg)
-        # Reorder columns to match training
-        df = df[list(model._training_columns)]
-        col_info["used_columns"] = list(model._training_columns)
+        if extra_cols:
+            logger.warning(f"Extra columns detected in evaluation data that will be dropped: {extra_cols}")
+            col_info["extra_columns_dropped"] = extra_cols
+        # Drop extras and reorder to match training in one step, skipped when already aligned
+        if not df.columns.equals(training_cols):
+            df = df.reindex(columns=training_cols, copy=False)
+        col_info["used_columns"] = training_cols.tolist()
 
     try:
-        predictions = model.predict(df)
+        # Models fitted on a plain float32 array are given one here too,
+        # since the columns were already aligned by name above
+        if getattr(model, "feature_names_in_", None) is None and training_cols is not None:
+            predictions = model.predict(df.to_numpy(dtype=np.float32))
+        else:
+            predictions = model.predict(df)
         logger.info(f"Prediction completed successfully on {len(predictions)} samples.")
     except Exception as e:
         logger.error(f"Prediction failed: {e}")
         raise e
 
-    results = {"predictions": predictions.tolist(), "column_info": col_info}
+    # Arrays are returned as-is; callers serialize them (see evaluation_routes)
+    results = {"predictions": np.asarray(predictions), "column_info": col_info}
 
     if y_true is not None:
         metrics = {}
@@ -84,7 +125,7 @@ def evaluate_model(new_df: pd.DataFrame, model_path: str, target_col: Optional[s
         else:
             logger.warning("Unknown model type; skipping metric computation.")
         results["metrics"] = metrics
-        results["actual"] = y_true.tolist()
+        results["actual"] = np.ascontiguousarray(y_true.to_numpy())
 
     logger.info("Evaluation completed successfully.")
     return results
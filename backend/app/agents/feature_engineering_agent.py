@@ -1,9 +1,14 @@
+import os
 import pandas as pd
 import numpy as np
 import logging
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from sklearn.impute import SimpleImputer, KNNImputer
-from sklearn.preprocessing import LabelEncoder, OneHotEncoder, StandardScaler, MinMaxScaler, PolynomialFeatures
+from sklearn.preprocessing import LabelEncoder, OneHotEncoder, OrdinalEncoder
+
+from ..utils.date_utils import parse_datetime
+from ..utils.dtype_utils import split_columns_by_dtype
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -25,13 +30,42 @@ def remove_outliers_iqr(df: pd.DataFrame, col: str, factor: float = 1.5) -> pd.D
     logger.info(f"Removed {removed} outliers from '{col}' using factor={factor}.")
     return df[mask]
 
+def _outlier_mask(df: pd.DataFrame, outlier_plan: Dict[str, float]) -> np.ndarray:
+    """
+    Build one row mask for every column in the outlier plan over a single float64 block.
+    Columns are filtered in plan order, each column's quartiles taken over the rows kept
+    by the previous ones, so the result matches calling remove_outliers_iqr per column.
+    """
+    cols = list(outlier_plan.keys())
+    arr = df[cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    mask = np.ones(len(df), dtype=bool)
+    for j, col in enumerate(cols):
+        values = arr[mask, j]
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            # No bounds can be computed, as with pandas' NaN quartiles: nothing is kept
+            removed = int(mask.sum())
+            mask[:] = False
+        else:
+            factor = outlier_plan[col]
+            Q1, Q3 = np.quantile(values, [0.25, 0.75])
+            IQR = Q3 - Q1
+            keep = mask & (arr[:, j] >= Q1 - factor * IQR) & (arr[:, j] <= Q3 + factor * IQR)
+            removed = int(mask.sum() - keep.sum())
+            mask = keep
+        logger.info(f"Removed {removed} outliers from '{col}' using factor={outlier_plan[col]}.")
+    return mask
+
 def create_date_features(df: pd.DataFrame, col: str, drop_original: bool = False) -> pd.DataFrame:
     """Create new date-based features from a date column."""
-    df[col] = pd.to_datetime(df[col], errors='coerce')
-    df[f"{col}_year"] = df[col].dt.year
-    df[f"{col}_month"] = df[col].dt.month
-    df[f"{col}_day"] = df[col].dt.day
-    df[f"{col}_dayofweek"] = df[col].dt.dayofweek
+    df[col] = parse_datetime(df[col])
+    # Decode the datetime buffer once and write all four parts as one block;
+    # int16 is enough for every part, but NaT rows need a float block to hold NaN.
+    dt = pd.DatetimeIndex(df[col])
+    parts = np.stack([dt.year, dt.month, dt.day, dt.dayofweek], axis=1)
+    parts = parts.astype(np.float64 if dt.hasnans else np.int16)
+    new_cols = [f"{col}_year", f"{col}_month", f"{col}_day", f"{col}_dayofweek"]
+    df[new_cols] = pd.DataFrame(parts, columns=new_cols, index=df.index)
     if drop_original:
         df.drop(columns=[col], inplace=True)
         logger.info(f"Dropped original date column '{col}'.")
@@ -45,7 +79,7 @@ def _impute_column(df: pd.DataFrame, col: str, strategy: str, knn_neighbors: int
     Supported strategies: mean, median, mode, knn, drop.
     """
     series = df[col]
-    if series.isnull().sum() == 0:
+    if not series.hasnans:
         return df
 
     strategy_l = strategy.lower()
@@ -81,6 +115,49 @@ def _impute_column(df: pd.DataFrame, col: str, strategy: str, knn_neighbors: int
         logger.warning(f"Unknown impute strategy '{strategy}' for column '{col}'. Skipping.")
     return df
 
+def _impute_frame(df: pd.DataFrame, impute_plan: Dict[str, str], knn_neighbors: int = 3) -> pd.DataFrame:
+    """
+    Impute every column in the plan at once: columns are grouped by strategy, fill values
+    are computed per group and applied with a single fillna call. Non-numeric columns fall
+    back to mode for mean/median/knn, as in _impute_column.
+    """
+    null_counts = df.isnull().sum()
+    groups: Dict[str, list] = {"mean": [], "median": [], "mode": [], "knn": [], "drop": []}
+    for col, strategy in impute_plan.items():
+        if col not in df.columns or null_counts[col] == 0:
+            continue
+        strategy_l = strategy.lower()
+        if strategy_l not in groups:
+            logger.warning(f"Unknown impute strategy '{strategy}' for column '{col}'. Skipping.")
+            continue
+        if strategy_l in ("mean", "median", "knn") and not pd.api.types.is_numeric_dtype(df[col]):
+            strategy_l = "mode"
+        groups[strategy_l].append(col)
+
+    if groups["drop"]:
+        before = len(df)
+        df = df.dropna(subset=groups["drop"])
+        logger.info(f"Dropped {before - len(df)} rows with missing values in {groups['drop']}.")
+
+    fill_values: Dict[str, object] = {}
+    if groups["mean"]:
+        fill_values.update(df[groups["mean"]].mean().to_dict())
+    if groups["median"]:
+        fill_values.update(df[groups["median"]].median().to_dict())
+    if groups["mode"]:
+        fill_values.update(df[groups["mode"]].mode().iloc[0].to_dict())
+    if fill_values:
+        df = df.fillna(fill_values)
+        for strategy_l in ("mean", "median", "mode"):
+            if groups[strategy_l]:
+                logger.info(f"Imputed {groups[strategy_l]} via {strategy_l}.")
+
+    if groups["knn"]:
+        knn = KNNImputer(n_neighbors=knn_neighbors)
+        df[groups["knn"]] = knn.fit_transform(df[groups["knn"]])
+        logger.info(f"Imputed {groups['knn']} via KNN (k={knn_neighbors}).")
+    return df
+
 def convert_column_dtype(df: pd.DataFrame, col: str, conversion: str) -> pd.DataFrame:
     """Convert the data type of a column based on the provided conversion."""
     if conversion == "numeric":
@@ -91,44 +168,177 @@ def convert_column_dtype(df: pd.DataFrame, col: str, conversion: str) -> pd.Data
         logger.info(f"Converted '{col}' to category.")
     return df
 
-def _scale_numeric(df: pd.DataFrame, scaler_name: str = "standard") -> pd.DataFrame:
-    """Scale numeric columns using StandardScaler or MinMaxScaler."""
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
+def _scale_numeric(df: pd.DataFrame, scaler_name: str = "standard", numeric_cols: Optional[List[str]] = None) -> pd.DataFrame:
+    """Scale numeric columns with standard (z-score) or min-max scaling."""
+    if numeric_cols is None:
+        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
     if len(numeric_cols) == 0:
         logger.info("No numeric columns for scaling.")
         return df
 
-    scaler = StandardScaler() if scaler_name.lower() == "standard" else MinMaxScaler()
-    df[numeric_cols] = scaler.fit_transform(df[numeric_cols])
+    # One-shot transform computed directly on a column-major block: same result as
+    # StandardScaler/MinMaxScaler (NaNs ignored, constant columns left unscaled)
+    # without sklearn's validation and fitted-state bookkeeping.
+    dtype = np.float32 if all(df[c].dtype == np.float32 for c in numeric_cols) else np.float64
+    X = np.asfortranarray(df[numeric_cols].to_numpy(dtype=dtype, na_value=np.nan))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if scaler_name.lower() == "standard":
+            X -= np.nanmean(X, axis=0)
+            std = np.sqrt(np.nanmean(np.square(X), axis=0))
+            X /= np.where(std < 10 * np.finfo(dtype).eps, 1, std)
+        else:
+            lo = np.nanmin(X, axis=0)
+            span = np.nanmax(X, axis=0) - lo
+            X -= lo
+            X /= np.where(span < 10 * np.finfo(dtype).eps, 1, span)
+    df[numeric_cols] = X
     logger.info(f"Numeric columns scaled via {scaler_name} scaler.")
     return df
 
-def _polynomial_features(df: pd.DataFrame, degree: int = 2, interaction_only: bool = False, include_bias: bool = False) -> pd.DataFrame:
+def _polynomial_expand(
+    X: np.ndarray,
+    names: List[str],
+    degree: int = 2,
+    interaction_only: bool = False,
+    include_bias: bool = False
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Expand X into polynomial terms with the same column order and names as sklearn's
+    PolynomialFeatures. Degree-d terms are built by multiplying the degree-(d-1) block
+    by one base column at a time, writing straight into a preallocated F-ordered array.
+    """
+    n_samples, n_features = X.shape
+    # Exponent vector of every output column, used to size the output and name the terms
+    powers: List[Tuple[int, ...]] = []
+    if include_bias:
+        powers.append((0,) * n_features)
+    for i in range(n_features):
+        powers.append(tuple(int(j == i) for j in range(n_features)))
+    index = list(range(len(powers) - n_features, len(powers))) + [len(powers)]
+    blocks = []
+    for _ in range(2, degree + 1):
+        new_index = []
+        end = index[-1]
+        for i in range(n_features):
+            start = index[i]
+            if interaction_only:
+                start += index[i + 1] - index[i]
+            new_index.append(len(powers))
+            if start >= end:
+                break
+            blocks.append((len(powers), start, end, i))
+            for p in powers[start:end]:
+                powers.append(tuple(e + (j == i) for j, e in enumerate(p)))
+        new_index.append(len(powers))
+        index = new_index
+
+    XP = np.empty((n_samples, len(powers)), dtype=X.dtype, order="F")
+    offset = 0
+    if include_bias:
+        XP[:, 0] = 1
+        offset = 1
+    XP[:, offset:offset + n_features] = X
+    for pos, start, end, i in blocks:
+        np.multiply(XP[:, start:end], X[:, i:i + 1], out=XP[:, pos:pos + end - start])
+
+    out_names = []
+    for p in powers:
+        terms = [names[j] if e == 1 else f"{names[j]}^{e}" for j, e in enumerate(p) if e > 0]
+        out_names.append(" ".join(terms) if terms else "1")
+    return XP, out_names
+
+def _polynomial_features(
+    df: pd.DataFrame,
+    degree: int = 2,
+    interaction_only: bool = False,
+    include_bias: bool = False,
+    numeric_cols: Optional[List[str]] = None
+) -> pd.DataFrame:
     """Add polynomial features to numeric columns."""
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    if numeric_cols is None:
+        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
     if len(numeric_cols) == 0:
         logger.info("No numeric columns found for polynomial features.")
         return df
 
-    poly = PolynomialFeatures(degree=degree, interaction_only=interaction_only, include_bias=include_bias)
-    poly_data = poly.fit_transform(df[numeric_cols])
-    poly_cols = poly.get_feature_names_out(numeric_cols)
+    # Keep float32 input in float32 so the expanded block is half the size
+    dtype = np.float32 if all(df[c].dtype == np.float32 for c in numeric_cols) else np.float64
+    X = df[numeric_cols].to_numpy(dtype=dtype)
+    poly_data, poly_cols = _polynomial_expand(
+        X, [str(c) for c in numeric_cols], degree=degree, interaction_only=interaction_only, include_bias=include_bias
+    )
     poly_df = pd.DataFrame(poly_data, columns=poly_cols, index=df.index)
     df = pd.concat([df, poly_df], axis=1)
     logger.info(f"Polynomial features added (degree={degree}, interaction_only={interaction_only}).")
     return df
 
-def _log_transform(df: pd.DataFrame) -> pd.DataFrame:
+def _log_transform(df: pd.DataFrame, numeric_cols: Optional[List[str]] = None) -> pd.DataFrame:
     """Apply log transformation to strictly positive numeric columns."""
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    for col in numeric_cols:
-        if (df[col] > 0).all():
-            df[f"log_{col}"] = np.log(df[col])
+    if numeric_cols is None:
+        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    if len(numeric_cols) == 0:
+        return df
+    # Positivity test and log run once over the whole numeric block instead of per column
+    dtype = np.float32 if all(df[c].dtype == np.float32 for c in numeric_cols) else np.float64
+    X = df[numeric_cols].to_numpy(dtype=dtype, na_value=np.nan)
+    positive = (X > 0).all(axis=0)
+    for col, ok in zip(numeric_cols, positive):
+        if ok:
             logger.info(f"Log transform applied to {col}.")
         else:
             logger.warning(f"Column {col} has non-positive values; skipping log transform.")
+    if positive.any():
+        X_log = X[:, positive]
+        np.log(X_log, out=X_log)
+        log_names = [f"log_{col}" for col, ok in zip(numeric_cols, positive) if ok]
+        # Add all log columns in one concat instead of growing the frame column by column
+        stale = [c for c in log_names if c in df.columns]
+        df = pd.concat([df.drop(columns=stale), pd.DataFrame(X_log, columns=log_names, index=df.index)], axis=1)
     return df
 
+class DtypeCache:
+    """
+    Numeric / categorical / datetime column lists for the pipeline's current frame.
+    The pipeline calls refresh() only after steps that add, drop or retype columns.
+    """
+    def __init__(self, df: pd.DataFrame):
+        self.refresh(df)
+
+    def refresh(self, df: pd.DataFrame) -> None:
+        self.numeric_cols, self.cat_cols, self.datetime_cols = split_columns_by_dtype(df)
+
+def _parallel_columns(
+    df: pd.DataFrame,
+    cols: List[str],
+    fn: Callable[[pd.DataFrame, str], Any],
+    max_workers: Optional[int] = None
+) -> List[Any]:
+    """
+    Apply fn(df, col) to each column on a thread pool and return the results in column order.
+    The pandas/NumPy kernels doing the per-column work release the GIL, so independent
+    columns run concurrently; workers only read df, results are assigned by the caller.
+    """
+    workers = min(max_workers or os.cpu_count() or 1, len(cols))
+    if workers <= 1:
+        return [fn(df, col) for col in cols]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda col: fn(df, col), cols))
+
+def _frequency_encode(df: pd.DataFrame, col: str) -> pd.Series:
+    """Relative frequency of each value (same as value_counts(normalize=True) + map), gathered by category code."""
+    codes = pd.Categorical(df[col]).codes
+    valid = codes >= 0
+    counts = np.bincount(codes[valid])
+    freq = np.full(len(codes), np.nan)
+    freq[valid] = counts[codes[valid]] / max(valid.sum(), 1)
+    return pd.Series(freq, index=df.index)
+
+def _one_hot_block(df: pd.DataFrame, cols: List[str], dtype: type = np.float64) -> pd.DataFrame:
+    """One-hot encode the given columns and return the encoded block, aligned to df's index."""
+    encoder = OneHotEncoder(drop='first', sparse_output=False, handle_unknown='ignore', dtype=dtype)
+    encoded_data = encoder.fit_transform(df[cols].astype(str))
+    return pd.DataFrame(encoded_data, columns=encoder.get_feature_names_out(cols), index=df.index)
+
 def run_advanced_feature_engineering(
     df: pd.DataFrame,
     impute_plan: Optional[Dict[str, str]] = None,
@@ -145,7 +355,9 @@ def run_advanced_feature_engineering(
     include_bias: bool = False,
     apply_log: bool = False,
     high_card_threshold: int = 10,          # NEW parameter
-    high_card_option: str = "frequency"       # NEW parameter: 'one-hot', 'frequency', or 'drop'
+    high_card_option: str = "frequency",      # NEW parameter: 'one-hot', 'frequency', or 'drop'
+    use_float32: bool = True,
+    encoding_for_trees: bool = False
 ) -> pd.DataFrame:
     """
     Run the full advanced feature engineering pipeline, including imputation,
@@ -156,71 +368,96 @@ def run_advanced_feature_engineering(
     try:
         # 1) Imputation plan
         if impute_plan:
-            for col, strategy in impute_plan.items():
-                if col in df.columns:
-                    df = _impute_column(df, col, strategy, knn_neighbors)
-        # 2) Fill leftover categorical nulls
-        for col in df.select_dtypes(include=["object", "category"]).columns:
-            if df[col].isnull().sum() > 0:
-                df[col] = df[col].fillna(cat_impute_value)
-                logger.info(f"Filled missing in {col} with '{cat_impute_value}'.")
-        # 3) Outlier removal
+            df = _impute_frame(df, impute_plan, knn_neighbors)
+        dcache = DtypeCache(df)
+        # 2) Fill leftover categorical nulls in a single fillna call
+        cat_null_counts = df[dcache.cat_cols].isnull().sum()
+        cat_null_cols = cat_null_counts[cat_null_counts > 0].index.tolist()
+        if cat_null_cols:
+            df = df.fillna({col: cat_impute_value for col in cat_null_cols})
+            logger.info(f"Filled missing in {cat_null_cols} with '{cat_impute_value}'.")
+        # 3) Outlier removal, applied as one combined filter
         if outlier_plan:
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            for col, factor in outlier_plan.items():
-                if col in numeric_cols and factor > 0:
-                    df = remove_outliers_iqr(df, col, factor=factor)
+            active_plan = {col: factor for col, factor in outlier_plan.items() if col in dcache.numeric_cols and factor > 0}
+            if active_plan:
+                df = df[_outlier_mask(df, active_plan)]
         # 4) Date feature creation
         if date_plan:
             for date_col, drop_orig in date_plan.items():
                 if date_col in df.columns:
                     df = create_date_features(df, date_col, drop_original=drop_orig)
+            dcache.refresh(df)
         # 5) Data type conversion
         if convert_plan:
             for col, conv in convert_plan.items():
                 if col in df.columns:
                     df = convert_column_dtype(df, col, conv)
-        # 6) Categorical encoding with high-cardinality handling:
-        cat_cols = df.select_dtypes(include=["object", "category"]).columns.tolist()
-        if cat_cols:
-            let_low = [col for col in cat_cols if df[col].nunique() <= high_card_threshold]
-            let_high = [col for col in cat_cols if df[col].nunique() > high_card_threshold]
+            dcache.refresh(df)
+        # 6) Categorical encoding with high-cardinality handling. Encoded blocks are collected
+        #    and joined with a single drop + concat, so the frame is rebuilt once, not per step.
+        cat_cols = dcache.cat_cols
+        if cat_cols and encoding_for_trees:
+            # Tree models split on integer codes directly: one narrow column per category
+            # instead of one dense column per level, and no concat.
+            max_levels = int(df[cat_cols].nunique().max())
+            code_dtype = next(t for t in (np.int8, np.int16, np.int32) if max_levels <= np.iinfo(t).max + 1)
+            encoder = OrdinalEncoder(dtype=code_dtype, handle_unknown='use_encoded_value', unknown_value=-1)
+            codes = encoder.fit_transform(df[cat_cols].astype(str))
+            df[cat_cols] = pd.DataFrame(codes, columns=cat_cols, index=df.index)
+            dcache.refresh(df)
+            logger.info("Ordinal encoded categorical columns for tree-based models.")
+        elif cat_cols:
+            n_unique = df[cat_cols].nunique()
+            let_low = [col for col in cat_cols if n_unique[col] <= high_card_threshold]
+            let_high = [col for col in cat_cols if n_unique[col] > high_card_threshold]
+            drop_cols: list = []
+            new_blocks: list = []
+            # Low- and (optionally) high-cardinality one-hot columns share one encoder call,
+            # producing a single dense block emitted directly in the target dtype.
+            onehot_cols = let_low + (let_high if high_card_option == 'one-hot' else [])
+            if onehot_cols:
+                onehot_dtype = np.float32 if use_float32 else np.float64
+                new_blocks.append(_one_hot_block(df, onehot_cols, dtype=onehot_dtype))
+                drop_cols.extend(onehot_cols)
             if let_low:
-                encoder = OneHotEncoder(drop='first', sparse_output=False, handle_unknown='ignore')
-                encoded_data = encoder.fit_transform(df[let_low].astype(str))
-                encoded_cols = encoder.get_feature_names_out(let_low)
-                encoded_df = pd.DataFrame(encoded_data, columns=encoded_cols, index=df.index)
-                df.drop(columns=let_low, inplace=True)
-                df = pd.concat([df, encoded_df], axis=1)
                 logger.info("One-hot encoded low-cardinality categorical columns.")
             if let_high:
                 if high_card_option == 'frequency':
-                    for col in let_high:
-                        freq = df[col].value_counts(normalize=True)
-                        df[col + '_freq'] = df[col].map(freq)
-                        df.drop(columns=[col], inplace=True)
+                    freqs = _parallel_columns(df, let_high, _frequency_encode)
+                    new_blocks.append(pd.DataFrame(
+                        {col + '_freq': freq for col, freq in zip(let_high, freqs)},
+                        index=df.index
+                    ))
+                    drop_cols.extend(let_high)
                     logger.info("Frequency encoded high-cardinality categorical columns.")
                 elif high_card_option == 'drop':
-                    df.drop(columns=let_high, inplace=True)
+                    drop_cols.extend(let_high)
                     logger.info("Dropped high-cardinality categorical columns.")
                 elif high_card_option == 'one-hot':
-                    encoder = OneHotEncoder(drop='first', sparse_output=False, handle_unknown='ignore')
-                    encoded_data = encoder.fit_transform(df[let_high].astype(str))
-                    encoded_cols = encoder.get_feature_names_out(let_high)
-                    encoded_df = pd.DataFrame(encoded_data, columns=encoded_cols, index=df.index)
-                    df.drop(columns=let_high, inplace=True)
-                    df = pd.concat([df, encoded_df], axis=1)
                     logger.info("One-hot encoded high-cardinality categorical columns.")
                 else:
                     logger.warning(f"Unknown high_card_option '{high_card_option}'. Skipping high-card encoding.")
-        # 7) Numeric scaling
-        df = _scale_numeric(df, scaling_method)
+            if drop_cols or new_blocks:
+                df = pd.concat([df.drop(columns=drop_cols), *new_blocks], axis=1)
+                dcache.refresh(df)
+        # 7) Numeric scaling, on a float32 block unless disabled to halve memory traffic
+        if use_float32:
+            if dcache.numeric_cols:
+                df[dcache.numeric_cols] = df[dcache.numeric_cols].astype(np.float32, copy=False)
+        df = _scale_numeric(df, scaling_method, numeric_cols=dcache.numeric_cols)
         # 8) Polynomial features
         if apply_poly:
-            df = _polynomial_features(df, degree=poly_degree, interaction_only=interaction_only, include_bias=include_bias)
+            df = _polynomial_features(
+                df,
+                degree=poly_degree,
+                interaction_only=interaction_only,
+                include_bias=include_bias,
+                numeric_cols=dcache.numeric_cols
+            )
+            dcache.refresh(df)
         # 9) Log transformation
         if apply_log:
-            df = _log_transform(df)
+            df = _log_transform(df, numeric_cols=dcache.numeric_cols)
         logger.info("Advanced feature engineering completed.")
         return df
     except Exception as e:
@@ -249,5 +486,7 @@ def apply_feature_transformations(df: pd.DataFrame, plan: Optional[dict] = None)
         include_bias=plan.get("include_bias", False),
         apply_log=plan.get("apply_log", False),
         high_card_threshold=plan.get("high_card_threshold", 10),
-        high_card_option=plan.get("high_card_option", "frequency")
+        high_card_option=plan.get("high_card_option", "frequency"),
+        use_float32=plan.get("use_float32", True),
+        encoding_for_trees=plan.get("encoding_for_trees", False)
     )
@@ -3,14 +3,21 @@ import logging
 import warnings
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.figure import Figure
 import io
+import re
 import base64
+import hashlib
+import joblib
 from typing import Optional, Tuple, List, Dict
 
 from prophet import Prophet
 from statsmodels.tsa.arima.model import ARIMA
 
+from ..utils.date_utils import parse_datetime, dates_from_parts
+
 # Create a module-specific logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -22,31 +29,65 @@ if not logger.hasHandlers():
 warnings.filterwarnings("ignore", category=UserWarning)
 os.makedirs("reports", exist_ok=True)
 
+_DATE_NAME_RE = re.compile(r"date|time", re.IGNORECASE)
+
+FORECAST_CACHE_DIR = os.path.join("reports", ".cache")
+# Fitted forecasts keyed by a content hash of the series plus the fit parameters
+memory = joblib.Memory(location=FORECAST_CACHE_DIR, verbose=0)
+
+def _series_key(df: pd.DataFrame) -> str:
+    """
+    Content hash of the ['ds', 'y'] series, passed to the cached fits instead of the data itself.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(pd.to_datetime(df["ds"]).to_numpy(dtype="datetime64[ns]").view("i8").tobytes())
+    h.update(df["y"].to_numpy(dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+@memory.cache(ignore=["df"])
+def _fit_prophet_cached(
+    data_key: str,
+    df: pd.DataFrame,
+    forecast_period: int,
+    uncertainty_samples: int = 1000
+) -> pd.DataFrame:
+    if df.shape[0] < 50:
+        model = Prophet(
+            growth='flat',
+            changepoint_prior_scale=0.01,
+            n_changepoints=0,
+            changepoint_range=0.0,
+            yearly_seasonality=False,
+            weekly_seasonality=False,
+            daily_seasonality=False,
+            uncertainty_samples=uncertainty_samples
+        )
+    else:
+        model = Prophet(changepoint_prior_scale=0.01, uncertainty_samples=uncertainty_samples)
+    model.fit(df)
+    future = model.make_future_dataframe(periods=forecast_period)
+    return model.predict(future)
+
+@memory.cache(ignore=["y"])
+def _fit_arima_cached(data_key: str, y: np.ndarray, order: Tuple[int, int, int], forecast_period: int) -> np.ndarray:
+    # Only the point forecast is used: skip the parameter covariance and the stored
+    # smoother output, and fit on a bare array so no index handling is involved.
+    model_fit = ARIMA(y, order=order).fit(low_memory=True, cov_type="none")
+    return model_fit.forecast(steps=forecast_period)
+
 def detect_datetime_columns(df: pd.DataFrame) -> Tuple[List[str], pd.DataFrame]:
     """
     Detect potential datetime columns in a DataFrame based on dtype or column name.
     Also attempts to reconstruct a date from separate year/month/day columns.
     """
     datetime_cols = [
-        col for col in df.columns
-        if pd.api.types.is_datetime64_any_dtype(df[col])
-        or "date" in col.lower()
-        or "time" in col.lower()
+        col for col, dtype in df.dtypes.items()
+        if pd.api.types.is_datetime64_any_dtype(dtype) or _DATE_NAME_RE.search(str(col))
     ]
-    lower_cols = [c.lower() for c in df.columns]
-    if {"date_year", "date_month", "date_day"}.issubset(lower_cols):
+    ymd = {str(col).lower(): col for col in df.columns}
+    if {"date_year", "date_month", "date_day"}.issubset(ymd):
         try:
-            year_col = [col for col in df.columns if col.lower() == "date_year"][0]
-            month_col = [col for col in df.columns if col.lower() == "date_month"][0]
-            day_col = [col for col in df.columns if col.lower() == "date_day"][0]
-            df["Reconstructed_Date"] = pd.to_datetime(
-                df[[year_col, month_col, day_col]].rename(columns={
-                    year_col: "year",
-                    month_col: "month",
-                    day_col: "day"
-                }),
-                errors="coerce"
-            )
+            df["Reconstructed_Date"] = dates_from_parts(df[ymd["date_year"]], df[ymd["date_month"]], df[ymd["date_day"]])
             datetime_cols.append("Reconstructed_Date")
             logger.info("Created 'Reconstructed_Date' from year/month/day.")
         except Exception as e:
@@ -59,32 +100,46 @@ def plot_forecast(forecast_results: pd.DataFrame, model_name: str, historical: O
     Returns a base64 encoded PNG image string.
     """
     try:
-        plt.figure(figsize=(10, 5))
-        plt.plot(forecast_results["ds"], forecast_results["yhat"], label="Predicted", color="blue")
+        # Standalone Figure on Agg: no pyplot state to create or clean up per call
+        fig = Figure(figsize=(10, 5))
+        ax = fig.subplots()
+        ax.plot(forecast_results["ds"], forecast_results["yhat"], label="Predicted", color="blue")
         if "yhat_lower" in forecast_results.columns and "yhat_upper" in forecast_results.columns:
-            plt.fill_between(
+            ax.fill_between(
                 forecast_results["ds"],
                 forecast_results["yhat_lower"],
                 forecast_results["yhat_upper"],
                 color="blue", alpha=0.2
             )
         if historical is not None and {"ds", "y"}.issubset(historical.columns):
-            plt.plot(historical["ds"], historical["y"], label="Historical", color="black", linestyle="--")
-        plt.title(f"{model_name} Forecast")
-        plt.xlabel("Date")
-        plt.ylabel("Forecasted Value")
-        plt.legend()
-        plt.grid(True)
+            ax.plot(historical["ds"], historical["y"], label="Historical", color="black", linestyle="--")
+        ax.set_title(f"{model_name} Forecast")
+        ax.set_xlabel("Date")
+        ax.set_ylabel("Forecasted Value")
+        ax.legend()
+        ax.grid(True)
         buf = io.BytesIO()
-        plt.savefig(buf, format="png", bbox_inches="tight")
-        buf.seek(0)
-        image_base64 = base64.b64encode(buf.read()).decode('utf-8')
-        plt.close()
+        # Deflate dominates encoding time for small plots; level 1 is much faster at a slightly larger size
+        fig.savefig(buf, format="png", bbox_inches="tight", pil_kwargs={"compress_level": 1})
+        image_base64 = base64.b64encode(buf.getbuffer()).decode('utf-8')
         return image_base64
     except Exception as e:
         logger.exception("Error plotting forecast")
         raise
 
+def decimate_history(df: pd.DataFrame, max_history: int) -> pd.DataFrame:
+    """
+    Reduce a series to at most max_history rows while still spanning its full range:
+    the most recent half is kept as-is and older rows are stride-sampled into the other half.
+    """
+    if df.shape[0] <= max_history:
+        return df
+    recent_n = max_history // 2
+    older = df.iloc[:-recent_n] if recent_n > 0 else df
+    old_budget = max_history - recent_n
+    stride = -(-len(older) // old_budget)
+    return pd.concat([older.iloc[::stride], df.tail(recent_n)])
+
 def naive_forecast(df: pd.DataFrame, forecast_period: int) -> pd.DataFrame:
     """
     Returns a naive forecast by repeating the last observed value.
@@ -116,18 +171,21 @@ def train_prophet(
     target_col: str,
     forecast_period: int,
     max_history: int = 10000,
-    resample_freq: Optional[str] = None
+    resample_freq: Optional[str] = None,
+    include_intervals: bool = True
 ) -> Dict[str, any]:
     """
     Train a Prophet model on the data.
     Expects df to have at least one datetime column.
+    Histories longer than max_history are decimated (see decimate_history) rather than truncated.
+    With include_intervals=False, Prophet's posterior sampling is skipped and yhat_lower/yhat_upper equal yhat.
     Returns a dictionary with the forecast DataFrame and a base64-encoded forecast plot.
     """
     datetime_cols, df = detect_datetime_columns(df)
     if not datetime_cols:
         raise ValueError("No valid date column found for Prophet forecasting.")
     date_col = datetime_cols[0]
-    df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
+    df[date_col] = parse_datetime(df[date_col])
     df = df[[date_col, target_col]].dropna()
     if df.shape[0] < 10:
         raise ValueError("Not enough data points (<10) for Prophet.")
@@ -136,23 +194,11 @@ def train_prophet(
     if resample_freq:
         df = df.set_index("ds").resample(resample_freq).mean().reset_index()
     if df.shape[0] > max_history:
-        df = df.tail(max_history)
+        df = decimate_history(df, max_history)
     try:
-        if df.shape[0] < 50:
-            model = Prophet(
-                growth='flat',
-                changepoint_prior_scale=0.01,
-                n_changepoints=0,
-                changepoint_range=0.0,
-                yearly_seasonality=False,
-                weekly_seasonality=False,
-                daily_seasonality=False
-            )
-        else:
-            model = Prophet(changepoint_prior_scale=0.01)
-        model.fit(df)
-        future = model.make_future_dataframe(periods=forecast_period)
-        forecast = model.predict(future)
+        forecast = _fit_prophet_cached(
+            _series_key(df), df, forecast_period, uncertainty_samples=1000 if include_intervals else 0
+        )
     except Exception as e:
         logger.warning(f"Prophet training failed: {e}. Using naive fallback.")
         forecast = naive_forecast(df, forecast_period)
@@ -179,7 +225,7 @@ def train_arima(
     if not datetime_cols:
         raise ValueError("No valid date column found for ARIMA forecasting.")
     date_col = datetime_cols[0]
-    df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
+    df[date_col] = parse_datetime(df[date_col])
     df = df[[date_col, target_col]].dropna()
     if df.shape[0] < 10:
         raise ValueError("ARIMA requires at least 10 data points.")
@@ -187,9 +233,9 @@ def train_arima(
         df = df.tail(max_history)
     df.rename(columns={date_col: "ds", target_col: "y"}, inplace=True)
     df["y"] = pd.to_numeric(df["y"], errors="coerce").fillna(df["y"].median())
-    model = ARIMA(df["y"], order=order)
-    model_fit = model.fit()
-    forecast_values = model_fit.forecast(steps=forecast_period)
+    forecast_values = _fit_arima_cached(
+        _series_key(df), df["y"].to_numpy(dtype=np.float64), tuple(order), forecast_period
+    )
     last_date = df["ds"].max()
     future_dates = pd.date_range(start=last_date + pd.Timedelta(days=1), periods=forecast_period, freq="D")
     forecast_results = pd.DataFrame({
@@ -7,14 +7,20 @@ import sys
 import joblib
 import numpy as np
 import pandas as pd
+from functools import lru_cache
 from typing import List, Optional, Dict, Callable
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV, RandomizedSearchCV
-from sklearn.metrics import accuracy_score, f1_score, mean_squared_error, r2_score, mean_absolute_error, precision_score, recall_score
+from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV, RandomizedSearchCV, KFold
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingGridSearchCV, HalvingRandomSearchCV
+from sklearn.metrics import accuracy_score, f1_score, r2_score, mean_absolute_error, precision_score, recall_score
 from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier, GradientBoostingRegressor, GradientBoostingClassifier
 from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.svm import SVR, SVC
+from sklearn.svm import SVR, SVC, LinearSVR, LinearSVC
+from sklearn.calibration import CalibratedClassifierCV
 from sklearn.preprocessing import OneHotEncoder, LabelEncoder, StandardScaler, MinMaxScaler
-from sklearn.base import is_classifier, is_regressor
+from sklearn.base import clone, is_classifier, is_regressor
+
+from ..utils.dtype_utils import split_columns_by_dtype
 
 try:
     from xgboost import XGBRegressor, XGBClassifier
@@ -29,32 +35,80 @@ if not logger.hasHandlers():
     handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
     logger.addHandler(handler)
 
+MODEL_PICKLE_PROTOCOL = 5  # PEP 574 out-of-band buffers for the estimators' NumPy arrays
+# Left uncompressed on purpose: evaluation loads models with mmap_mode="r", which only
+# works on uncompressed joblib files.
+MODEL_COMPRESS = 0
+HALVING_MIN_SAMPLES = 1000  # below this a full grid is cheap enough to search exhaustively
+HALVING_FACTOR = 3  # successive halving keeps the best 1/factor of candidates per round
+SVM_LINEAR_MIN_SAMPLES = 20000  # from this many training rows, kernel SVMs are swapped for LIBLINEAR
+
+@lru_cache(maxsize=1)
+def _xgb_device_params() -> Dict[str, object]:
+    """
+    XGBoost placement: the GPU when CUDA is available, otherwise all CPU cores.
+    torch is already installed for sentence-transformers, so it doubles as the CUDA probe;
+    it is imported here, on the first XGBoost model built, not when this module loads.
+    """
+    try:
+        import torch
+        cuda_available = torch.cuda.is_available()
+    except ImportError:
+        cuda_available = False
+    return {"tree_method": "hist", "device": "cuda"} if cuda_available else {"n_jobs": -1}
+
 def get_models(task_type: str) -> Dict[str, object]:
     if task_type.lower() == "regression":
         models = {
             "LinearRegression": LinearRegression(),
-            "RandomForestRegressor": RandomForestRegressor(n_estimators=50, random_state=42),
+            "RandomForestRegressor": RandomForestRegressor(n_estimators=50, random_state=42, n_jobs=-1),
             "GradientBoostingRegressor": GradientBoostingRegressor(n_estimators=50, random_state=42),
             "SVR": SVR(),
         }
         if xgboost_available:
-            models["XGBRegressor"] = XGBRegressor(n_estimators=50, random_state=42)
+            models["XGBRegressor"] = XGBRegressor(n_estimators=50, random_state=42, **_xgb_device_params())
         return models
     else:
         models = {
             "LogisticRegression": LogisticRegression(max_iter=1000),
-            "RandomForestClassifier": RandomForestClassifier(n_estimators=50, random_state=42),
+            "RandomForestClassifier": RandomForestClassifier(n_estimators=50, random_state=42, n_jobs=-1),
             "GradientBoostingClassifier": GradientBoostingClassifier(n_estimators=50, random_state=42),
             "SVC": SVC(probability=True),
         }
         if xgboost_available:
-            models["XGBClassifier"] = XGBClassifier(n_estimators=50, random_state=42)
+            models["XGBClassifier"] = XGBClassifier(n_estimators=50, random_state=42, **_xgb_device_params())
+        return models
+
+def use_linear_svms(models: Dict[str, object], n_samples: int) -> Dict[str, object]:
+    """
+    Replace kernel SVC/SVR (LIBSVM, roughly quadratic in samples) with their LIBLINEAR
+    counterparts on large training sets. SVC keeps predict_proba via calibration.
+    """
+    if n_samples < SVM_LINEAR_MIN_SAMPLES:
         return models
+    models = dict(models)
+    if "SVR" in models:
+        models["SVR"] = LinearSVR(dual="auto", random_state=42)
+        logger.info(f"Using LinearSVR for SVR on {n_samples} training rows.")
+    if "SVC" in models:
+        models["SVC"] = CalibratedClassifierCV(LinearSVC(dual="auto", random_state=42), cv=3)
+        logger.info(f"Using calibrated LinearSVC for SVC on {n_samples} training rows.")
+    return models
+
+def _rmse(y_true, y_pred) -> float:
+    """
+    Root mean squared error computed in a single residual buffer that is squared in place.
+    The buffer is allocated per call so concurrent training requests never share it.
+    """
+    yt = np.asarray(y_true, dtype=np.float64).ravel()
+    resid = np.subtract(yt, np.asarray(y_pred, dtype=np.float64).ravel(), out=np.empty_like(yt))
+    np.multiply(resid, resid, out=resid)
+    return float(np.sqrt(resid.mean()))
 
 def get_metrics(task_type: str) -> Dict[str, Callable]:
     if task_type.lower() == "regression":
         return {
-            "RMSE": lambda y_true, y_pred: float(np.sqrt(mean_squared_error(y_true, y_pred))),
+            "RMSE": _rmse,
             "R2": r2_score,
             "MAE": mean_absolute_error,
         }
@@ -84,30 +138,165 @@ def get_default_param_grid(model_name: str, task_type: str) -> dict:
     return grids.get(model_name, {})
 
 def apply_minimal_encoding_scaling(df: pd.DataFrame, apply_encoding: bool, encoding_method: str, apply_scaling: bool, scaling_method: str, exclude_columns: Optional[List[str]] = None) -> pd.DataFrame:
-    df = df.copy()
-    if exclude_columns is None:
-        exclude_columns = []
+    # Shallow copy: untouched columns keep sharing memory with the caller's frame. Every
+    # change below replaces whole columns one at a time, which never writes into the
+    # shared arrays, so the caller's frame is left as it was.
+    df = df.copy(deep=False)
+    excluded = set(exclude_columns or [])
+    # One dtype pass up front; encoding only turns categorical columns into numeric ones
+    numeric_cols, cat_cols, _ = split_columns_by_dtype(df)
+    numeric_cols = [c for c in numeric_cols if c not in excluded]
+    cat_cols = [c for c in cat_cols if c not in excluded]
     if apply_encoding:
-        cat_cols = [c for c in df.select_dtypes(include=["object", "category"]).columns if c not in exclude_columns]
         if encoding_method == "label":
+            # factorize(sort=True) yields the same codes as LabelEncoder (sorted classes)
             for c in cat_cols:
-                le = LabelEncoder()
-                df[c] = le.fit_transform(df[c].astype(str))
+                df[c] = pd.factorize(df[c].astype(str), sort=True)[0]
+            encoded_cols = cat_cols
         else:
+            encoded_cols = []
             if len(cat_cols) > 0:
                 ohe = OneHotEncoder(sparse_output=False, drop='first', handle_unknown='ignore')
                 encoded = ohe.fit_transform(df[cat_cols].astype(str))
                 new_cols = ohe.get_feature_names_out(cat_cols)
-                enc_df = pd.DataFrame(encoded, columns=new_cols, index=df.index)
-                df.drop(columns=cat_cols, inplace=True)
-                df = pd.concat([df, enc_df], axis=1)
+                # Rebuild from a dict of columns with copy=False; drop + concat would copy
+                # every remaining column of the caller's frame.
+                dropped = set(cat_cols)
+                columns = {c: df[c] for c in df.columns if c not in dropped}
+                columns.update({name: encoded[:, i] for i, name in enumerate(new_cols)})
+                df = pd.DataFrame(columns, index=df.index, copy=False)
+                encoded_cols = [c for c in new_cols if c not in excluded]
+        scale_set = set(numeric_cols).union(encoded_cols)
+        numeric_cols = [c for c in df.columns if c in scale_set]
     if apply_scaling:
-        numeric_cols = [c for c in df.select_dtypes(include=[np.number]).columns if c not in exclude_columns]
         if len(numeric_cols) > 0:
             scaler = MinMaxScaler() if scaling_method == "minmax" else StandardScaler()
-            df[numeric_cols] = scaler.fit_transform(df[numeric_cols])
+            scaled = scaler.fit_transform(df[numeric_cols])
+            for i, c in enumerate(numeric_cols):
+                df[c] = scaled[:, i]
     return df
 
+def cross_val_score_additive(estimator, X, y, cv: int = 3, n_jobs: int = -1) -> np.ndarray:
+    """
+    R2 cross-validation scores without refitting, for ordinary least squares.
+    The normal-equation statistics X'X and X'y are sums over samples, so the training
+    statistics of each fold are the full totals minus that fold's share. Uses the same
+    unshuffled KFold splits as cross_val_score(cv=int); other estimators fall back to it.
+    """
+    if not (type(estimator) is LinearRegression and estimator.fit_intercept and not estimator.positive):
+        return cross_val_score(estimator, X, y, scoring='r2', cv=cv, n_jobs=n_jobs)
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64).ravel()
+    Xa = np.column_stack([X, np.ones(len(X))])
+    folds = [test for _, test in KFold(n_splits=cv).split(Xa)]
+    fold_gram = [Xa[idx].T @ Xa[idx] for idx in folds]
+    fold_xty = [Xa[idx].T @ y[idx] for idx in folds]
+    gram, xty = sum(fold_gram), sum(fold_xty)
+    scores = []
+    for idx, g_i, b_i in zip(folds, fold_gram, fold_xty):
+        coef = np.linalg.lstsq(gram - g_i, xty - b_i, rcond=None)[0]
+        scores.append(r2_score(y[idx], Xa[idx] @ coef))
+    return np.asarray(scores)
+
+def _with_n_jobs(estimator, n_jobs: int):
+    """
+    Set n_jobs on an estimator, and on the inner estimator of a meta-estimator, where it has one.
+    """
+    params = estimator.get_params()
+    updates = {key: n_jobs for key in ("n_jobs", "estimator__n_jobs") if key in params}
+    return estimator.set_params(**updates) if updates else estimator
+
+def _train_one(
+    model_name: str,
+    model_obj,
+    X: pd.DataFrame,
+    y,
+    X_train: pd.DataFrame,
+    X_test: pd.DataFrame,
+    y_train,
+    y_test,
+    feature_names: pd.Index,
+    task_type: str,
+    metrics_to_evaluate: Dict[str, Callable],
+    selected_metrics: List[str],
+    enable_cross_validation: bool,
+    cv_folds: int,
+    hyperparameter_tuning: bool,
+    hyperparameter_search_method: str,
+    random_search_iter: int,
+    model_folder: str,
+    n_jobs: int = 1
+) -> Optional[tuple]:
+    """
+    Tune (optionally), fit, score and save a single model.
+    n_jobs is this model's share of the cores: searches and CV spread their fits over it with
+    single-threaded estimators, and only the final fit hands it to the estimator itself, so
+    parallelism is never nested.
+    Returns (model_name, results_row, model_filename), or None if training failed.
+    """
+    try:
+        logger.info(f"Training {model_name}...")
+        model_obj = _with_n_jobs(model_obj, 1)
+        # Keep only the grid entries this estimator accepts (e.g. no 'kernel' for LinearSVR),
+        # routing them to the inner estimator of meta-estimators such as CalibratedClassifierCV
+        valid_params = model_obj.get_params()
+        param_grid = {
+            (key if key in valid_params else f"estimator__{key}"): values
+            for key, values in get_default_param_grid(model_name, task_type).items()
+            if key in valid_params or f"estimator__{key}" in valid_params
+        }
+        if hyperparameter_tuning and param_grid:
+            scoring_method = "accuracy" if task_type.lower() == "classification" else "neg_mean_squared_error"
+            # On larger training sets, successive halving scores every candidate on a subsample
+            # first and only refits the survivors on more rows.
+            use_halving = len(X_train) >= HALVING_MIN_SAMPLES
+            if hyperparameter_search_method == "random":
+                if use_halving:
+                    search = HalvingRandomSearchCV(model_obj, param_grid, n_candidates=random_search_iter, factor=HALVING_FACTOR, resource='n_samples', min_resources='exhaust', cv=cv_folds, scoring=scoring_method, random_state=42, n_jobs=n_jobs)
+                else:
+                    search = RandomizedSearchCV(model_obj, param_grid, n_iter=random_search_iter, cv=cv_folds, scoring=scoring_method, random_state=42, n_jobs=n_jobs, pre_dispatch='2*n_jobs')
+            else:
+                if use_halving:
+                    search = HalvingGridSearchCV(model_obj, param_grid, factor=HALVING_FACTOR, resource='n_samples', min_resources='exhaust', cv=cv_folds, scoring=scoring_method, random_state=42, n_jobs=n_jobs)
+                else:
+                    search = GridSearchCV(model_obj, param_grid, cv=cv_folds, scoring=scoring_method, n_jobs=n_jobs, pre_dispatch='2*n_jobs')
+            search.fit(X_train, y_train)
+            model_obj = search.best_estimator_
+            logger.info(f"Best params for {model_name}: {search.best_params_}")
+        model_obj = _with_n_jobs(model_obj, n_jobs)
+        start_time = time.time()
+        model_obj.fit(X_train, y_train)
+        training_time = time.time() - start_time
+        y_pred = model_obj.predict(X_test)
+        row = {"Model": model_name, "Training_Time_sec": round(training_time, 3)}
+        for metric_name, metric_func in metrics_to_evaluate.items():
+            val = metric_func(y_test, y_pred)
+            row[metric_name] = round(float(val), 4)
+        if enable_cross_validation:
+            try:
+                if task_type.lower() == "classification" and "F1" in selected_metrics:
+                    cv_scores = cross_val_score(_with_n_jobs(clone(model_obj), 1), X, y, scoring='f1_weighted', cv=cv_folds, n_jobs=n_jobs)
+                    row["CV_F1_Avg"] = round(float(np.mean(cv_scores)), 4)
+                elif task_type.lower() == "regression" and "R2" in selected_metrics:
+                    cv_scores = cross_val_score_additive(_with_n_jobs(clone(model_obj), 1), X, y, cv=cv_folds, n_jobs=n_jobs)
+                    row["CV_R2_Avg"] = round(float(np.mean(cv_scores)), 4)
+            except Exception as cv_error:
+                logger.error(f"CV failed for {model_name}: {cv_error}")
+        # Estimators fitted on the float32 array record no column names, so they are kept on a
+        # plain attribute for evaluation to align by name. feature_names_in_ itself is not set:
+        # it is a read-only property on XGBoost's estimators.
+        if getattr(model_obj, "feature_names_in_", None) is None:
+            model_obj._training_columns = list(feature_names)
+        timestamp = int(time.time())
+        model_filename = f"{model_name}_{timestamp}.pkl"
+        model_path = os.path.join(model_folder, model_filename)
+        joblib.dump(model_obj, model_path, compress=MODEL_COMPRESS, protocol=MODEL_PICKLE_PROTOCOL)
+        logger.info(f"Saved model {model_name} at {model_path}")
+        return model_name, row, model_filename
+    except Exception as e:
+        logger.exception(f"Training failed for {model_name}")
+        return None
+
 def train_and_evaluate_models(
     df: pd.DataFrame,
     target_col: str,
@@ -155,57 +344,41 @@ def train_and_evaluate_models(
         le = LabelEncoder()
         y = le.fit_transform(y)
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    feature_names = X_train.columns
+    # Convert the feature blocks to contiguous float32 once, instead of every estimator
+    # (and every CV fold) validating and copying the DataFrame on its own.
+    if all(pd.api.types.is_numeric_dtype(dtype) for dtype in X.dtypes):
+        X, X_train, X_test = (np.ascontiguousarray(block.to_numpy(dtype=np.float32)) for block in (X, X_train, X_test))
     model_dict = get_models(task_type)
     metric_dict = get_metrics(task_type)
-    models_to_train = {m: model_dict[m] for m in selected_models if m in model_dict}
+    models_to_train = use_linear_svms({m: model_dict[m] for m in selected_models if m in model_dict}, len(X_train))
     metrics_to_evaluate = {m: metric_dict[m] for m in selected_metrics if m in metric_dict}
     logger.info(f"Training models: {list(models_to_train.keys())}")
     logger.info(f"Evaluating metrics: {list(metrics_to_evaluate.keys())}")
     results = []
     trained_models = {}
-    for model_name, model_obj in models_to_train.items():
-        try:
-            logger.info(f"Training {model_name}...")
-            param_grid = get_default_param_grid(model_name, task_type)
-            if hyperparameter_tuning and param_grid:
-                scoring_method = "accuracy" if task_type.lower() == "classification" else "neg_mean_squared_error"
-                if hyperparameter_search_method == "random":
-                    search = RandomizedSearchCV(model_obj, param_grid, n_iter=random_search_iter, cv=cv_folds, scoring=scoring_method, random_state=42)
-                else:
-                    search = GridSearchCV(model_obj, param_grid, cv=cv_folds, scoring=scoring_method)
-                search.fit(X_train, y_train)
-                model_obj = search.best_estimator_
-                logger.info(f"Best params for {model_name}: {search.best_params_}")
-            start_time = time.time()
-            model_obj.fit(X_train, y_train)
-            training_time = time.time() - start_time
-            model_obj._training_columns = X_train.columns.tolist()
-            y_pred = model_obj.predict(X_test)
-            row = {"Model": model_name, "Training_Time_sec": round(training_time, 3)}
-            for metric_name, metric_func in metrics_to_evaluate.items():
-                val = metric_func(y_test, y_pred)
-                row[metric_name] = round(float(val), 4)
-            if enable_cross_validation:
-                try:
-                    if task_type.lower() == "classification" and "F1" in selected_metrics:
-                        cv_scores = cross_val_score(model_obj, X, y, scoring='f1_weighted', cv=cv_folds)
-                        row["CV_F1_Avg"] = round(float(np.mean(cv_scores)), 4)
-                    elif task_type.lower() == "regression" and "R2" in selected_metrics:
-                        cv_scores = cross_val_score(model_obj, X, y, scoring='r2', cv=cv_folds)
-                        row["CV_R2_Avg"] = round(float(np.mean(cv_scores)), 4)
-                except Exception as cv_error:
-                    logger.error(f"CV failed for {model_name}: {cv_error}")
-            timestamp = int(time.time())
-            model_filename = f"{model_name}_{timestamp}.pkl"
-            model_path = os.path.join(model_folder, model_filename)
-            joblib.dump(model_obj, model_path)
-            logger.info(f"Saved model {model_name} at {model_path}")
-            # Store just the filename so that evaluation endpoints can use the session folder.
-            trained_models[model_name] = model_filename
-            results.append(row)
-        except Exception as e:
-            logger.exception(f"Training failed for {model_name}")
+    # Independent models fit concurrently in separate worker processes; with a single
+    # model (or a single core) joblib runs the loop in-process. Each model gets an equal
+    # share of the remaining cores for its own search, CV or fit.
+    n_cpus = os.cpu_count() or 1
+    n_model_jobs = max(1, min(len(models_to_train), n_cpus))
+    inner_jobs = max(1, n_cpus // n_model_jobs)
+    outcomes = joblib.Parallel(n_jobs=n_model_jobs, backend="loky")(
+        joblib.delayed(_train_one)(
+            model_name, model_obj, X, y, X_train, X_test, y_train, y_test, feature_names,
+            task_type, metrics_to_evaluate, selected_metrics, enable_cross_validation, cv_folds,
+            hyperparameter_tuning, hyperparameter_search_method, random_search_iter, model_folder,
+            inner_jobs
+        )
+        for model_name, model_obj in models_to_train.items()
+    )
+    for outcome in outcomes:
+        if outcome is None:
             continue
+        model_name, row, model_filename = outcome
+        # Store just the filename so that evaluation endpoints can use the session folder.
+        trained_models[model_name] = model_filename
+        results.append(row)
     if results:
         try:
             if dataset_id:
@@ -21,15 +21,37 @@ if not logger.hasHandlers():
 INDEX_FILE = "data_1/faiss_index.index"
 METADATA_FILE = "data_1/metadata.json"
 DOCS_FOLDER = "data_1/documents"
+HNSW_EF_SEARCH = 64  # candidate list size for HNSW queries; ample for top-k <= 10
+IVF_NPROBE = 16  # inverted lists scanned per query on IVF-PQ indexes
 
 retrieval_model = SentenceTransformer('all-MiniLM-L6-v2')
 index = None
 metadata = None
 if os.path.exists(INDEX_FILE) and os.path.exists(METADATA_FILE):
     index = faiss.read_index(INDEX_FILE)
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    elif hasattr(index, "nprobe"):
+        index.nprobe = IVF_NPROBE
     with open(METADATA_FILE, "r", encoding="utf-8") as f:
         metadata = json.load(f)
 
+def load_documents(filenames) -> dict:
+    """
+    Read the referenced documents once so retrieval does no file I/O per query.
+    Files that don't exist are left out and reported as not found at query time.
+    """
+    docs = {}
+    for filename in filenames:
+        try:
+            with open(os.path.join(DOCS_FOLDER, filename), "r", encoding="utf-8") as f:
+                docs[filename] = f.read()
+        except FileNotFoundError:
+            continue
+    return docs
+
+DOC_CACHE = load_documents({meta["filename"] for meta in metadata}) if metadata else {}
+
 CHUNK_SIZE = 500
 OVERLAP = 100
 
@@ -45,8 +67,8 @@ def retrieve_context(query: str, top_k: int = 3) -> str:
     """
     if index is None or metadata is None:
         return "No retrieval index loaded."
-    query_embedding = retrieval_model.encode([query])
-    query_embedding = np.array(query_embedding).astype("float32")
+    query_embedding = retrieval_model.encode([query], convert_to_numpy=True, normalize_embeddings=True)
+    query_embedding = np.asarray(query_embedding, dtype="float32")
     distances, indices = index.search(query_embedding, top_k)
     combined_text = ""
     for idx in indices[0]:
@@ -54,11 +76,13 @@ def retrieve_context(query: str, top_k: int = 3) -> str:
             meta = metadata[idx]
             filename = meta["filename"]
             chunk_idx = meta["chunk_idx"]
-            file_path = os.path.join(DOCS_FOLDER, filename)
-            if os.path.exists(file_path):
-                with open(file_path, "r", encoding="utf-8") as f:
-                    doc_text = f.read()
-                snippet = get_chunk_text(doc_text, chunk_idx)
+            doc_text = DOC_CACHE.get(filename)
+            if doc_text is not None:
+                # Indexes built with chunk offsets slice directly; older metadata recomputes them
+                if "start" in meta:
+                    snippet = doc_text[meta["start"]:meta["end"]]
+                else:
+                    snippet = get_chunk_text(doc_text, chunk_idx)
                 combined_text += f"Snippet from {filename} (chunk {chunk_idx}):\n{snippet}\n\n"
             else:
                 combined_text += f"[File not found: {filename}]\n\n"
@@ -3,14 +3,30 @@ import logging
 import pandas as pd
 import numpy as np
 import uuid
-from typing import List, Optional, Tuple, Union
+import joblib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from ..utils.file_utils import load_dataset
+from ..utils.file_utils import load_dataset, save_raw_copy, write_csv, write_column_summary
+from ..utils.date_utils import parse_datetime
+from ..utils.dtype_utils import split_columns_by_dtype
 from sklearn.impute import KNNImputer, SimpleImputer
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 
+try:
+    import faiss
+    faiss_available = True
+except ImportError:
+    faiss_available = False
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+TRANSFORMERS_SUFFIX = "_transformers.joblib"  # fitted scaler/encoders saved next to the processed CSV
+DATE_PARSE_MAX_WORKERS = 8  # upper bound on threads used to parse date columns
+DATE_SAMPLE_SIZE = 1000  # values sampled per candidate column when detecting dates
+FAISS_IMPUTE_MIN_ROWS = 50000  # from this many rows, KNN imputation searches complete rows with faiss
+
 def identify_column_types(
     df: pd.DataFrame,
     explicit_datetime_cols: Optional[List[str]] = None,
@@ -19,8 +35,7 @@ def identify_column_types(
     """
     Identify numerical, categorical, and datetime columns in a DataFrame.
     """
-    numerical_features = df.select_dtypes(include=[np.number]).columns.tolist()
-    categorical_features = df.select_dtypes(include=['object', 'category']).columns.tolist()
+    numerical_features, categorical_features, native_datetime = split_columns_by_dtype(df)
     datetime_features = []
 
     # Mark explicit datetime columns first
@@ -31,16 +46,21 @@ def identify_column_types(
 
     # Attempt to detect datetime columns from remaining candidates
     remaining_candidates = set(df.columns) - set(numerical_features) - set(datetime_features)
+    native_datetime = set(native_datetime)
+    categorical_set = set(categorical_features)
     for col in remaining_candidates:
-        if col in df.select_dtypes(include=['datetime']):
+        if col in native_datetime:
             datetime_features.append(col)
-        elif col in categorical_features:
+        elif col in categorical_set:
             series_sample = df[col].dropna()
             if not series_sample.empty:
-                sample_size = min(1000, series_sample.shape[0])
+                sample_size = min(DATE_SAMPLE_SIZE, series_sample.shape[0])
                 series_sample = series_sample.sample(sample_size, random_state=42)
-                converted = pd.to_datetime(series_sample, errors='coerce')
-                conversion_rate = converted.notnull().mean()
+                # Cheap screen first: a column where too few values contain a digit can't
+                # reach the threshold, so it never goes through the datetime parser.
+                if series_sample.astype(str).str.contains(r"\d", regex=True).mean() < date_detection_threshold:
+                    continue
+                conversion_rate = parse_datetime(series_sample).notnull().mean()
                 if conversion_rate >= date_detection_threshold:
                     datetime_features.append(col)
 
@@ -54,24 +74,96 @@ def identify_column_types(
 
     return numerical_features, categorical_features, datetime_features
 
-def remove_outliers_iqr(df: pd.DataFrame, col: str, factor: float = 1.5) -> pd.DataFrame:
+def _faiss_knn_impute(X: np.ndarray, n_neighbors: int) -> np.ndarray:
+    """
+    KNN imputation using complete rows as donors. Rows are grouped by missingness pattern
+    and each group searches a flat faiss index over the donors' observed columns, which
+    ranks donors the same way as sklearn's nan-euclidean distance.
+    """
+    missing = np.isnan(X)
+    complete = ~missing.any(axis=1)
+    donors = X[complete]
+    rows = np.flatnonzero(~complete)
+    out = X.copy()
+    patterns, inverse = np.unique(missing[rows], axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    col_means = np.nanmean(X, axis=0)
+    for p_idx, pattern in enumerate(patterns):
+        q_rows = rows[inverse == p_idx]
+        observed = ~pattern
+        if not observed.any():
+            out[np.ix_(q_rows, pattern)] = col_means[pattern]
+            continue
+        index = faiss.IndexFlatL2(int(observed.sum()))
+        index.add(np.ascontiguousarray(donors[:, observed]))
+        _, nn = index.search(np.ascontiguousarray(X[np.ix_(q_rows, observed)]), n_neighbors)
+        out[np.ix_(q_rows, pattern)] = donors[:, pattern][nn].mean(axis=1)
+    return out
+
+def knn_impute(X: np.ndarray, n_neighbors: int = 3) -> np.ndarray:
+    """
+    Impute missing values in a numeric block with k nearest neighbours, in float32.
+    Large tables with enough complete rows go through faiss; otherwise KNNImputer.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    if faiss_available and X.shape[0] >= FAISS_IMPUTE_MIN_ROWS:
+        if (~np.isnan(X).any(axis=1)).sum() >= n_neighbors:
+            return _faiss_knn_impute(X, n_neighbors)
+    return KNNImputer(n_neighbors=n_neighbors).fit_transform(X)
+
+def remove_outliers_iqr(df: pd.DataFrame, col: Union[str, List[str]], factor: float = 1.5) -> pd.DataFrame:
     """
-    Remove outliers from a numeric column using the IQR method.
+    Remove outliers from one or more numeric columns using the IQR method.
+    Columns are filtered in order, each column's quartiles taken over the rows kept by the
+    previous ones (the same result as calling this once per column), but on a single
+    NumPy block with one final row selection.
     """
+    cols = [col] if isinstance(col, str) else list(col)
     try:
-        Q1 = df[col].quantile(0.25)
-        Q3 = df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - factor * IQR
-        upper_bound = Q3 + factor * IQR
-        mask = (df[col] >= lower_bound) & (df[col] <= upper_bound)
-        removed_count = (~mask).sum()
-        logging.info(f"Removed {removed_count} outliers from '{col}' (factor={factor}).")
+        arr = df[cols].to_numpy(dtype=np.float64)
+        mask = np.ones(len(df), dtype=bool)
+        for j in range(len(cols)):
+            values = arr[mask, j]
+            values = values[~np.isnan(values)]
+            if values.size == 0:
+                # No bounds can be computed, as with pandas' NaN quartiles: nothing is kept
+                mask[:] = False
+                break
+            q1, q3 = np.quantile(values, [0.25, 0.75])
+            iqr = q3 - q1
+            mask &= (arr[:, j] >= q1 - factor * iqr) & (arr[:, j] <= q3 + factor * iqr)
+        removed_count = int((~mask).sum())
+        logging.info(f"Removed {removed_count} outliers from {cols} (factor={factor}).")
         return df[mask]
     except Exception as e:
-        logging.error(f"Error removing outliers in column '{col}': {e}")
+        logging.error(f"Error removing outliers in columns {cols}: {e}")
         raise
 
+def _densify_sparse_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert sparse columns back to dense ones in a single block, keeping the column order.
+    """
+    sparse_cols = [c for c, dtype in df.dtypes.items() if isinstance(dtype, pd.SparseDtype)]
+    if not sparse_cols:
+        return df
+    dense = pd.DataFrame(df[sparse_cols].sparse.to_coo().toarray(), index=df.index, columns=sparse_cols)
+    return pd.concat([df.drop(columns=sparse_cols), dense], axis=1)[df.columns]
+
+def _date_parts(col: str, values: pd.Series) -> Tuple[str, pd.Series, pd.DataFrame]:
+    """
+    Parse one column and extract year, month, day and dayofweek from a single DatetimeIndex.
+    """
+    parsed = parse_datetime(values)
+    dt = pd.DatetimeIndex(parsed)
+    parts = pd.DataFrame({
+        f"{col}_year": dt.year,
+        f"{col}_month": dt.month,
+        f"{col}_day": dt.day,
+        f"{col}_dayofweek": dt.dayofweek,
+    }, index=values.index)
+    # NaT parts come back as float with NaN, same as the .dt accessors
+    return col, parsed, parts
+
 def process_date_columns(
     df: pd.DataFrame,
     datetime_features: List[str],
@@ -80,17 +172,30 @@ def process_date_columns(
     """
     Convert date columns to datetime and extract year, month, day, and dayofweek.
     Optionally drops the original date columns.
+    Columns are parsed concurrently on a thread pool (the datetime kernels release the GIL)
+    and all new columns are joined in one concat; part columns that already exist are
+    overwritten in place, as a per-column assignment would.
     """
-    for col in datetime_features:
-        if col not in df.columns:
-            continue
-        df[col] = pd.to_datetime(df[col], errors='coerce')
-        df[f"{col}_year"] = df[col].dt.year
-        df[f"{col}_month"] = df[col].dt.month
-        df[f"{col}_day"] = df[col].dt.day
-        df[f"{col}_dayofweek"] = df[col].dt.dayofweek
+    cols = [col for col in datetime_features if col in df.columns]
+    if not cols:
+        return df
+    workers = min(DATE_PARSE_MAX_WORKERS, len(cols), os.cpu_count() or 1)
+    if workers <= 1:
+        results = [_date_parts(col, df[col]) for col in cols]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda col: _date_parts(col, df[col]), cols))
+    for col, parsed, _ in results:
+        df[col] = parsed
+    parts = pd.concat([parts for _, _, parts in results], axis=1)
+    existing = [c for c in parts.columns if c in df.columns]
+    if existing:
+        df[existing] = parts[existing]
+    df = pd.concat([df, parts.drop(columns=existing)], axis=1)
+    if drop_original_date_cols:
+        df.drop(columns=cols, inplace=True)
+    for col in cols:
         if drop_original_date_cols:
-            df.drop(columns=[col], inplace=True)
             logging.info(f"Processed and dropped original datetime column '{col}'.")
         else:
             logging.info(f"Processed datetime column '{col}' (original retained).")
@@ -135,7 +240,8 @@ def run_preprocessing_pipeline(
         raw_dir = "original_data"
         os.makedirs(raw_dir, exist_ok=True)
         raw_path = os.path.join(raw_dir, f"{raw_dataset_id}.csv")
-        df.to_csv(raw_path, index=False)
+        save_raw_copy(file, raw_path)
+        write_column_summary(df, raw_path)
         logging.info(f"Raw dataset saved at: {raw_path}")
 
         # Identify column types
@@ -145,13 +251,24 @@ def run_preprocessing_pipeline(
             date_detection_threshold=date_detection_threshold
         )
 
+        # Fitted state needed to replay the pipeline on new rows at inference time
+        transformers: Dict[str, Any] = {
+            "numerical_features": numerical_features,
+            "categorical_features": categorical_features,
+            "datetime_features": datetime_features,
+            "drop_original_date_cols": drop_original_date_cols,
+        }
+
         # Impute numeric columns
         if numerical_features:
             if impute_numeric.lower() == 'knn':
-                imputer = KNNImputer(n_neighbors=knn_neighbors)
+                df[numerical_features] = knn_impute(df[numerical_features].to_numpy(dtype=np.float32), knn_neighbors)
+                # KNN needs the training rows, so new rows fall back to the imputed column medians
+                transformers["numeric_fill"] = df[numerical_features].median()
             else:
                 imputer = SimpleImputer(strategy=impute_numeric)
-            df[numerical_features] = imputer.fit_transform(df[numerical_features])
+                df[numerical_features] = imputer.fit_transform(df[numerical_features])
+                transformers["numeric_fill"] = pd.Series(imputer.statistics_, index=numerical_features)
             logging.info(f"Numeric columns imputed using '{impute_numeric}' strategy.")
 
         # Fill missing values for categorical columns
@@ -159,10 +276,9 @@ def run_preprocessing_pipeline(
             df[categorical_features] = df[categorical_features].fillna('Unknown')
             logging.info("Filled missing categorical values with 'Unknown'.")
 
-        # Remove outliers column-wise
+        # Remove outliers column by column, in a single call
         if remove_outliers and numerical_features:
-            for col in numerical_features:
-                df = remove_outliers_iqr(df, col, factor=outlier_factor)
+            df = remove_outliers_iqr(df, numerical_features, factor=outlier_factor)
 
         # Process datetime columns
         if datetime_features:
@@ -172,6 +288,7 @@ def run_preprocessing_pipeline(
         if numerical_features:
             scaler = StandardScaler()
             df[numerical_features] = scaler.fit_transform(df[numerical_features])
+            transformers["scaler"] = scaler
             logging.info("Scaled numeric columns using StandardScaler.")
 
         # Encode categorical columns with high cardinality handling
@@ -179,6 +296,7 @@ def run_preprocessing_pipeline(
             # Split into low and high cardinality columns
             let_low = [col for col in categorical_features if df[col].nunique() <= high_card_threshold]
             let_high = [col for col in categorical_features if df[col].nunique() > high_card_threshold]
+            transformers.update({"let_low": let_low, "let_high": let_high, "high_card_option": high_card_option})
 
             # One-hot encode low-cardinality columns
             if let_low:
@@ -188,27 +306,38 @@ def run_preprocessing_pipeline(
                 encoded_df = pd.DataFrame(encoded_data, columns=encoded_cols, index=df.index)
                 df.drop(columns=let_low, inplace=True)
                 df = pd.concat([df, encoded_df], axis=1)
+                transformers["low_encoder"] = encoder
                 logging.info("One-hot encoded low-cardinality categorical columns.")
 
             # Process high-cardinality columns based on user option
             if let_high:
                 if high_card_option == 'frequency':
+                    # One factorize pass per column gives both the per-row codes and the
+                    # distinct values, so the frequencies are a bincount plus a gather.
+                    freq_maps = {}
                     for col in let_high:
-                        freq = df[col].value_counts(normalize=True)
-                        df[col + '_freq'] = df[col].map(freq)
-                        df.drop(columns=[col], inplace=True)
+                        codes, uniques = pd.factorize(df[col])
+                        valid = codes >= 0
+                        counts = np.bincount(codes[valid], minlength=len(uniques))
+                        freq = counts / max(valid.sum(), 1)
+                        df[col + '_freq'] = np.where(valid, freq[codes], np.nan)
+                        freq_maps[col] = pd.Series(freq, index=uniques)
+                    df.drop(columns=let_high, inplace=True)
+                    transformers["freq_maps"] = freq_maps
                     logging.info("Frequency encoded high-cardinality categorical columns.")
                 elif high_card_option == 'drop':
                     df.drop(columns=let_high, inplace=True)
                     logging.info("Dropped high-cardinality categorical columns.")
                 elif high_card_option == 'one-hot':
-                    # Warning: one-hot encoding high-card columns may create many features!
-                    encoder = OneHotEncoder(drop='first', sparse_output=False, handle_unknown='ignore')
+                    # High-card one-hot blocks are mostly zeros: they stay sparse while the CSV
+                    # is written and are densified once before the frame is returned.
+                    encoder = OneHotEncoder(drop='first', sparse_output=True, handle_unknown='ignore')
                     encoded_data = encoder.fit_transform(df[let_high].astype(str))
                     encoded_cols = encoder.get_feature_names_out(let_high)
-                    encoded_df = pd.DataFrame(encoded_data, columns=encoded_cols, index=df.index)
+                    encoded_df = pd.DataFrame.sparse.from_spmatrix(encoded_data, index=df.index, columns=encoded_cols)
                     df.drop(columns=let_high, inplace=True)
                     df = pd.concat([df, encoded_df], axis=1)
+                    transformers["high_encoder"] = encoder
                     logging.info("One-hot encoded high-cardinality categorical columns.")
                 else:
                     logging.warning(f"Unknown high_card_option '{high_card_option}'. Skipping high-card encoding.")
@@ -221,8 +350,16 @@ def run_preprocessing_pipeline(
             processed_dir = "processed_data"
             os.makedirs(processed_dir, exist_ok=True)
             final_path = os.path.join(processed_dir, f"{dataset_id}.csv")
-            df.to_csv(final_path, index=False)
+            write_csv(df, final_path)
+        # Nothing downstream (column summaries, sklearn) works on sparse columns natively
+        df = _densify_sparse_columns(df)
+        if save_processed:
+            write_column_summary(df, final_path)
             logging.info(f"Processed dataset saved at: {final_path}")
+            transformers["output_columns"] = df.columns.tolist()
+            transformers_path = os.path.join(processed_dir, f"{dataset_id}{TRANSFORMERS_SUFFIX}")
+            joblib.dump(transformers, transformers_path, compress=3)
+            logging.info(f"Fitted transformers saved at: {transformers_path}")
 
         logging.info("Preprocessing pipeline complete!")
         return df, final_path, dataset_id, raw_dataset_id
@@ -230,3 +367,56 @@ def run_preprocessing_pipeline(
     except Exception as e:
         logging.error(f"Preprocessing pipeline failed: {e}")
         raise
+
+@lru_cache(maxsize=32)
+def load_preprocessing_transformers(dataset_id: str, processed_dir: str = "processed_data") -> Dict[str, Any]:
+    """
+    Load the fitted transformers saved by run_preprocessing_pipeline, once per dataset.
+    """
+    path = os.path.join(processed_dir, f"{dataset_id}{TRANSFORMERS_SUFFIX}")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No saved transformers found for dataset_id={dataset_id}.")
+    return joblib.load(path)
+
+def apply_preprocessing_transformers(df: pd.DataFrame, transformers: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Replay a fitted preprocessing pipeline on new rows without refitting anything.
+    Outlier removal is a training-time filter and is not applied.
+    """
+    df = df.copy()
+    numerical_features = transformers["numerical_features"]
+    categorical_features = transformers["categorical_features"]
+    if numerical_features:
+        df[numerical_features] = df[numerical_features].fillna(transformers["numeric_fill"])
+    if categorical_features:
+        df[categorical_features] = df[categorical_features].fillna('Unknown')
+    if transformers["datetime_features"]:
+        df = process_date_columns(df, transformers["datetime_features"], transformers["drop_original_date_cols"])
+    if "scaler" in transformers:
+        df[numerical_features] = transformers["scaler"].transform(df[numerical_features])
+    let_low = transformers.get("let_low", [])
+    let_high = transformers.get("let_high", [])
+    if "low_encoder" in transformers:
+        encoder = transformers["low_encoder"]
+        encoded_df = pd.DataFrame(
+            encoder.transform(df[let_low].astype(str)), columns=encoder.get_feature_names_out(let_low), index=df.index
+        )
+        df = pd.concat([df.drop(columns=let_low), encoded_df], axis=1)
+    if let_high:
+        option = transformers["high_card_option"]
+        if option == 'frequency':
+            for col, freq in transformers["freq_maps"].items():
+                df[col + '_freq'] = df[col].map(freq)
+                df.drop(columns=[col], inplace=True)
+        elif option == 'drop':
+            df.drop(columns=let_high, inplace=True)
+        elif option == 'one-hot':
+            encoder = transformers["high_encoder"]
+            encoded_df = pd.DataFrame(
+                encoder.transform(df[let_high].astype(str)).toarray(),
+                index=df.index, columns=encoder.get_feature_names_out(let_high)
+            )
+            df = pd.concat([df.drop(columns=let_high), encoded_df], axis=1)
+    if "output_columns" in transformers:
+        df = df[transformers["output_columns"]]
+    return df
@@ -1,21 +1,125 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from typing import Optional
+from typing import Optional, Dict, Any, Callable
 import os
+import re
+import uuid
 import logging
 import pandas as pd
 import io
 import base64
-from fastapi.encoders import jsonable_encoder
+from concurrent.futures.process import BrokenProcessPool
 import numpy as np
+from matplotlib.figure import Figure
+
+try:
+    import orjson  # noqa: F401 -- picked up by Plotly's orjson JSON engine
+    orjson_available = True
+except ImportError:
+    orjson_available = False
+
+try:
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    plotly_available = True
+except ImportError:
+    plotly_available = False
 
 from backend.app.agents.eda_agent import generate_eda
-from backend.app.utils.file_utils import load_dataset
+from backend.app.utils.file_utils import load_dataset, frame_to_records, read_csv_sample, prune_subdirs
+from backend.app.utils.df_cache import get_df
+from backend.app.utils.figure_pool import FIGURE_POOL_WORKERS, get_figure_pool, shutdown_figure_pool
 
 router = APIRouter()
 logging.basicConfig(level=logging.INFO)
 
+PARALLEL_ENCODE_MIN_FIGURES = 4  # below this, pickling figures to the pool costs more than it saves
+EDA_FIGURES_DIR = os.path.join("reports", "figs")  # PNGs written per request, served as static files
+EDA_FIGURES_URL = "/static/figs"  # mount point of EDA_FIGURES_DIR (see main.py)
+EDA_FIGURES_MAX_DIRS = 50  # per-request figure directories kept; older ones are pruned
+EDA_FIGURES_MAX_AGE_S = 24 * 60 * 60  # figure directories older than a day are pruned
+EDA_STREAM_MIN_BYTES = 512 * 1024 * 1024  # larger CSVs are sampled while streaming, never fully loaded
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w.-]")
+
+def _png_data_url(png) -> str:
+    return f"data:image/png;base64,{base64.b64encode(png).decode('utf-8')}"
+
+def _encode_figure(fig) -> str:
+    """
+    Renders a Matplotlib figure to a base64 PNG data URL.
+    """
+    buf = io.BytesIO()
+    # Deflate dominates encoding time for small plots; level 1 is much faster at a slightly larger size
+    fig.savefig(buf, format='png', bbox_inches='tight', pil_kwargs={"compress_level": 1})
+    return _png_data_url(buf.getbuffer())
+
+def _save_figure_png(fig, file_path: str) -> None:
+    """
+    Renders a Matplotlib figure straight to a PNG file.
+    """
+    fig.savefig(file_path, format='png', bbox_inches='tight', pil_kwargs={"compress_level": 1})
+
+def _plotly_to_json(fig) -> str:
+    """
+    Serializes a Plotly figure without re-validating it, using orjson when installed.
+    """
+    return pio.to_json(fig, validate=False, engine="orjson" if orjson_available else "json")
+
+# Serializers for interactive figures by exact type; Matplotlib figures are PNG-encoded in bulk
+_FIGURE_SERIALIZERS: Dict[type, Callable[[Any], str]] = {}
+if plotly_available:
+    _FIGURE_SERIALIZERS[go.Figure] = _plotly_to_json
+
+def _serialize_figure(fig) -> str:
+    serializer = _FIGURE_SERIALIZERS.get(type(fig))
+    return serializer(fig) if serializer is not None else fig.to_json()
+
+def _encode_figures(figures: Dict[str, Any], out_dir: Optional[str] = None) -> Dict[str, str]:
+    """
+    Encodes static figures. PNG bytes already rendered by the EDA agent are used as they are;
+    Matplotlib figures are rendered here, in the shared figure pool when there are enough of them.
+    With out_dir the PNGs are written there and their static URLs returned; otherwise
+    each figure is returned inline as a base64 data URL.
+    """
+    pending = [name for name, fig in figures.items() if isinstance(fig, Figure)]
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+        # Column-derived names are made filesystem-safe; the position prefix keeps them unique
+        file_names = {name: f"{i:03d}_{_UNSAFE_FILENAME_CHARS.sub('_', name)}.png" for i, name in enumerate(figures)}
+        paths = [os.path.join(out_dir, file_names[name]) for name in pending]
+        func, args = _save_figure_png, ([figures[name] for name in pending], paths)
+    else:
+        func, args = _encode_figure, ([figures[name] for name in pending],)
+    results = None
+    if FIGURE_POOL_WORKERS > 0 and len(pending) >= PARALLEL_ENCODE_MIN_FIGURES:
+        try:
+            results = list(get_figure_pool().map(func, *args))
+        except BrokenProcessPool as e:
+            # A crashed worker breaks the pool; replace it next time and render this batch here
+            logging.warning(f"Figure pool failed ({e}); rendering in process.")
+            shutdown_figure_pool()
+    if results is None:
+        results = [func(*a) for a in zip(*args)]
+    encoded = dict(zip(pending, results))
+    for name, fig in figures.items():
+        if isinstance(fig, bytes):
+            if out_dir:
+                with open(os.path.join(out_dir, file_names[name]), "wb") as f:
+                    f.write(fig)
+            else:
+                encoded[name] = _png_data_url(fig)
+    if out_dir:
+        url_dir = f"{EDA_FIGURES_URL}/{os.path.basename(out_dir)}"
+        return {name: f"{url_dir}/{file_names[name]}" for name in figures}
+    return {name: encoded[name] for name in figures}
+
+def clear_eda_figures() -> None:
+    """
+    Delete every served EDA figure directory (called on /reset); the mount point itself stays.
+    """
+    prune_subdirs(EDA_FIGURES_DIR, max_entries=0)
+
 @router.post("/analysis/")
-async def perform_eda(
+def perform_eda(
     file: Optional[UploadFile] = File(None),
     dataset_id: Optional[str] = Form(None),
     folder: str = Form("processed_data"),
@@ -23,12 +127,18 @@ async def perform_eda(
     interactive: bool = Form(True),
     correlation_method: str = Form("pearson"),
     sample_size: int = Form(100000),
-    max_numeric_cols: int = Form(8)
+    max_numeric_cols: int = Form(8),
+    inline: bool = Form(False)
 ):
     try:
+        # Full-file row and missing-value totals, set only when df is a streamed sample
+        n_rows, missing_counts = None, None
         # PRIORITIZE an uploaded file over a stored dataset_id.
         if file:
-            df = load_dataset(file.file)
+            if sample_size and (file.size or 0) > EDA_STREAM_MIN_BYTES:
+                df, n_rows, missing_counts = read_csv_sample(file.file, sample_size)
+            else:
+                df = load_dataset(file.file)
             logging.info("Using uploaded file for EDA.")
         elif dataset_id:
             csv_path = os.path.join(folder, f"{dataset_id}.csv")
@@ -37,7 +147,10 @@ async def perform_eda(
                     status_code=400,
                     detail=f"No file found for dataset_id={dataset_id} in folder={folder}."
                 )
-            df = load_dataset(csv_path)
+            if sample_size and os.path.getsize(csv_path) > EDA_STREAM_MIN_BYTES:
+                df, n_rows, missing_counts = read_csv_sample(csv_path, sample_size)
+            else:
+                df = get_df(csv_path)
             logging.info(f"Using stored dataset_id {dataset_id} from folder {folder} for EDA.")
         else:
             raise HTTPException(
@@ -54,26 +167,27 @@ async def perform_eda(
             correlation_method=correlation_method,
             interactive=interactive,
             sample_size=sample_size,
-            max_numeric_cols=max_numeric_cols
+            max_numeric_cols=max_numeric_cols,
+            n_rows=n_rows,
+            missing_counts=missing_counts
         )
-        tables_json = {}
-        for name, table_df in eda_tables.items():
-            # Replace infs and NaNs for safe JSON serialization
-            table_df = table_df.replace([np.inf, -np.inf], np.nan).replace({np.nan: None})
-            records = table_df.to_dict(orient="records")
-            tables_json[name] = jsonable_encoder(records)
-        figures_json = {}
-        for fig_name, fig_obj in eda_figures.items():
-            if fig_obj is None:
-                continue
-            if hasattr(fig_obj, "to_json"):
-                figures_json[fig_name] = fig_obj.to_json()
-            else:
-                buf = io.BytesIO()
-                fig_obj.savefig(buf, format='png', bbox_inches='tight')
-                buf.seek(0)
-                img_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-                figures_json[fig_name] = f"data:image/png;base64,{img_base64}"
+        tables_json = {name: frame_to_records(table_df) for name, table_df in eda_tables.items()}
+        # Plotly figures serialize cheaply in place; per-column plots arrive as PNG bytes and
+        # the remaining Matplotlib figures are PNG-encoded, across processes when there are enough
+        figures = {name: fig for name, fig in eda_figures.items() if fig is not None}
+        static_figures = {name: fig for name, fig in figures.items() if isinstance(fig, (Figure, bytes))}
+        # PNGs are served as static files by default (no base64 inflation in the JSON);
+        # inline=True returns them as data URLs instead
+        out_dir = None
+        if not inline:
+            # Bound the static mount: each request adds a directory, so drop the oldest first
+            prune_subdirs(EDA_FIGURES_DIR, EDA_FIGURES_MAX_DIRS - 1, EDA_FIGURES_MAX_AGE_S)
+            out_dir = os.path.join(EDA_FIGURES_DIR, uuid.uuid4().hex)
+        encoded = _encode_figures(static_figures, out_dir) if static_figures else {}
+        figures_json = {
+            name: encoded[name] if name in encoded else _serialize_figure(fig)
+            for name, fig in figures.items()
+        }
         return {
             "status": "success",
             "eda_report": report_text,
@@ -1,29 +1,71 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Query
 import os
+import time
 import pandas as pd
 import logging
-from typing import Optional
+import numpy as np
+from typing import Optional, Dict, Any, List, Tuple
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
 from backend.app.agents.evaluation_agent import evaluate_model
 from backend.app.utils.file_utils import load_dataset
+from backend.app.utils.df_cache import get_df
+
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson_available = False
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+MODEL_INDEX_SETTLE_NS = 1_000_000_000  # directories modified within the last second are re-read
+# Model file listings keyed by directory, with the directory mtime they were read at
+_MODEL_INDEX: Dict[str, Tuple[int, List[str]]] = {}
+
+def _results_response(results: Dict[str, Any]) -> Response:
+    """
+    Serialize evaluation results, encoding numpy arrays natively with orjson when available.
+    Falls back to jsonable_encoder for object-dtype arrays or when orjson is missing.
+    """
+    payload = {"status": "success", "results": results}
+    if orjson_available:
+        try:
+            return Response(
+                content=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+                media_type="application/json"
+            )
+        except TypeError:
+            pass
+    plain = {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in results.items()}
+    return JSONResponse({"status": "success", "results": jsonable_encoder(plain)})
+
 @router.get("/list-models/")
 def list_models(session_id: Optional[str] = None):
     """
     Return a list of model files (.pkl or .joblib) in the session-specific folder.
     """
     model_dir = os.path.join("models", session_id) if session_id else "models"
-    if not os.path.exists(model_dir):
+    try:
+        dir_mtime = os.stat(model_dir).st_mtime_ns
+    except FileNotFoundError:
         return {"status": "success", "models": []}
+    # Adding or removing a file bumps the directory mtime, so an unchanged mtime means
+    # the cached listing is still valid and the directory isn't read again
+    cached = _MODEL_INDEX.get(model_dir)
+    if cached is not None and cached[0] == dir_mtime:
+        return {"status": "success", "models": list(cached[1])}
     model_files = [f for f in os.listdir(model_dir) if f.endswith(".pkl") or f.endswith(".joblib")]
+    # A listing taken in the same timestamp tick as a write could miss a second write
+    # with an identical mtime, so only settled directories are cached
+    if time.time_ns() - dir_mtime > MODEL_INDEX_SETTLE_NS:
+        _MODEL_INDEX[model_dir] = (dir_mtime, model_files)
     return {"status": "success", "models": model_files}
 
 @router.post("/evaluate/")
-async def evaluate(
+def evaluate(
     file: UploadFile = File(None),
     dataset_id: Optional[str] = Query(None),
     model_file: str = Form(...),
@@ -39,7 +81,7 @@ async def evaluate(
             data_path = f"processed_data/{dataset_id}.csv"
             if not os.path.exists(data_path):
                 raise HTTPException(status_code=400, detail=f"No processed file for dataset_id='{dataset_id}'.")
-            df = pd.read_csv(data_path)
+            df = get_df(data_path)
             if df.empty:
                 raise ValueError(f"File at {data_path} is empty or invalid.")
         else:
@@ -54,7 +96,7 @@ async def evaluate(
             raise ValueError(f"Model file {model_file} not found in '{model_dir}' directory.")
         target = target_col if has_target and target_col.strip() != "" else None
         results = evaluate_model(new_df=df, model_path=model_path, target_col=target)
-        return {"status": "success", "results": jsonable_encoder(results)}
+        return _results_response(results)
     except Exception as e:
         logger.error(f"Evaluation failed: {e}")
         raise HTTPException(status_code=500, detail=f"Evaluation failed: {str(e)}")
@@ -3,19 +3,18 @@ import os
 import json
 import logging
 from typing import Optional
-from fastapi.encoders import jsonable_encoder
 import pandas as pd
-import numpy as np
 
 from backend.app.agents.feature_engineering_agent import run_advanced_feature_engineering
-from backend.app.utils.file_utils import load_dataset, save_processed_data
+from backend.app.utils.file_utils import load_dataset, save_processed_data, frame_to_records, read_column_summary, summarize_columns
+from backend.app.utils.df_cache import get_df
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 @router.post("/advanced/")
-async def advanced_feature_engineering(
+def advanced_feature_engineering(
     file: Optional[UploadFile] = File(None),
     dataset_id: Optional[str] = Form(None),
     folder: str = Form("processed_data"),
@@ -46,7 +45,7 @@ async def advanced_feature_engineering(
                 if not os.path.exists(alt_path):
                     raise ValueError(f"No file found for dataset_id={dataset_id} in {folder} or {alt_folder}.")
                 csv_path = alt_path
-            df = load_dataset(csv_path)
+            df = get_df(csv_path)
         elif file:
             df = load_dataset(file.file)
         else:
@@ -85,15 +84,14 @@ async def advanced_feature_engineering(
         if save_result:
             processed_file_path = save_processed_data(df_fe, folder="feature_engineered_data")
 
-        df_fe = df_fe.replace([np.inf, -np.inf], np.nan).replace({np.nan: None, pd.NaT: None})
-        preview_count = min(len(df_fe), 1000)
-        records = df_fe.head(preview_count).to_dict(orient="records")
+        # Only the preview rows are converted for JSON, not the whole engineered frame
+        records = frame_to_records(df_fe.head(1000))
 
         return {
             "status": "success",
             "shape": [len(df_fe), df_fe.shape[1]],
             "processed_file_path": processed_file_path,
-            "sample_data": jsonable_encoder(records)
+            "sample_data": records
         }
 
     except Exception as e:
@@ -101,7 +99,7 @@ async def advanced_feature_engineering(
         raise HTTPException(status_code=500, detail=f"Feature engineering failed: {str(e)}")
 
 @router.get("/columns/")
-async def get_dataset_columns(dataset_id: str, folder: str = "processed_data"):
+def get_dataset_columns(dataset_id: str, folder: str = "processed_data"):
     """
     Return basic column information for a given dataset.
     """
@@ -113,22 +111,16 @@ async def get_dataset_columns(dataset_id: str, folder: str = "processed_data"):
                 raise ValueError(f"No file found in {folder} or original_data for dataset_id={dataset_id}.")
             csv_path = alt_path
 
-        df = load_dataset(csv_path)
-        if df.empty:
-            raise ValueError("Dataset is empty or failed to load.")
-
-        columns = list(df.columns)
-        missing_counts = {col: int(df[col].isnull().sum()) for col in columns}
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        object_cols = df.select_dtypes(include=["object", "category"]).columns.tolist()
+        # Datasets saved by this app have a column summary sidecar; only older ones are parsed
+        summary = read_column_summary(csv_path)
+        if summary is None:
+            # Only read here, so the cached frame is used without a copy
+            df = get_df(csv_path, copy=False)
+            if df.empty:
+                raise ValueError("Dataset is empty or failed to load.")
+            summary = summarize_columns(df)
 
-        return {
-            "status": "success",
-            "columns": columns,
-            "missing_counts": missing_counts,
-            "numeric_cols": numeric_cols,
-            "object_cols": object_cols
-        }
+        return {"status": "success", **summary}
 
     except Exception as e:
         logger.error(f"Failed to get columns for dataset_id={dataset_id}: {e}")
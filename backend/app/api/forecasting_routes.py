@@ -1,20 +1,18 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-import pandas as pd
-import numpy as np
 import logging
 import os
 from typing import Optional
-from fastapi.encoders import jsonable_encoder
 
 from backend.app.agents.forecasting_agent import train_prophet, train_arima
-from backend.app.utils.file_utils import load_dataset
+from backend.app.utils.file_utils import load_dataset, frame_to_records
+from backend.app.utils.df_cache import get_df
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 @router.post("/forecast/")
-async def forecast(
+def forecast(
     file: UploadFile = File(None),
     dataset_id: Optional[str] = Query(None),
     forecast_model: str = Query("prophet"),
@@ -35,7 +33,7 @@ async def forecast(
             data_path = f"{folder}/{dataset_id}.csv"
             if not os.path.exists(data_path):
                 raise HTTPException(status_code=400, detail=f"No file found for dataset_id='{dataset_id}' in folder '{folder}'.")
-            df = pd.read_csv(data_path)
+            df = get_df(data_path)
         else:
             if not file:
                 raise HTTPException(status_code=400, detail="No file uploaded and no dataset_id provided.")
@@ -62,15 +60,13 @@ async def forecast(
             model_name = "ARIMA"
         else:
             raise ValueError(f"Unknown forecast_model '{forecast_model}'.")
-        forecast_results_df = forecast_output["results"].replace([np.inf, -np.inf], np.nan)
-        forecast_results_df = forecast_results_df.replace({np.nan: None, pd.NaT: None})
-        records = forecast_results_df.to_dict(orient="records")
+        records = frame_to_records(forecast_output["results"])
         forecast_plot = forecast_output["plot"]
         return {
             "status": "success",
             "model": model_name,
             "forecast_period": forecast_period,
-            "results": jsonable_encoder(records),
+            "results": records,
             "forecast_plot": forecast_plot
         }
     except Exception as e:
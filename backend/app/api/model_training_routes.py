@@ -2,9 +2,9 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 import pandas as pd
 import logging
 from typing import List, Optional
-from fastapi.encoders import jsonable_encoder
 from backend.app.agents.model_training_agent import train_and_evaluate_models
 from backend.app.utils.file_utils import load_dataset
+from backend.app.utils.df_cache import get_df
 import os
 
 router = APIRouter()
@@ -12,7 +12,7 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 @router.post("/train/")
-async def train_models(
+def train_models(
     file: UploadFile = File(None),
     dataset_id: Optional[str] = Query(None),
     feature_engineered_id: Optional[str] = Query(None),
@@ -46,7 +46,7 @@ async def train_models(
                 data_path = f"original_data/{dataset_id}.csv"
                 if not os.path.exists(data_path):
                     raise HTTPException(status_code=400, detail=f"No original file found for dataset_id='{dataset_id}'.")
-                df = pd.read_csv(data_path)
+                df = get_df(data_path)
             else:
                 raise HTTPException(status_code=400, detail="No file or dataset_id provided for original dataset.")
         elif dataset_source == "preprocessed":
@@ -55,14 +55,14 @@ async def train_models(
             data_path = f"processed_data/{dataset_id}.csv"
             if not os.path.exists(data_path):
                 raise HTTPException(status_code=400, detail=f"No processed file found for dataset_id='{dataset_id}'.")
-            df = pd.read_csv(data_path)
+            df = get_df(data_path)
         elif dataset_source == "feature_engineered":
             if not feature_engineered_id:
                 raise HTTPException(status_code=400, detail="No feature_engineered_id provided.")
             data_path = f"feature_engineered_data/{feature_engineered_id}.csv"
             if not os.path.exists(data_path):
                 raise HTTPException(status_code=400, detail=f"No feature-engineered file for id='{feature_engineered_id}'.")
-            df = pd.read_csv(data_path)
+            df = get_df(data_path)
         else:
             raise HTTPException(status_code=400, detail=f"Unknown dataset_source='{dataset_source}'.")
         if df is None or df.empty:
@@ -93,7 +93,7 @@ async def train_models(
         )
         return {
             "status": "success",
-            "results": jsonable_encoder(output["results"]),
+            "results": output["results"],
             "trained_models": output["trained_models"]
         }
     except Exception as e:
@@ -1,15 +1,85 @@
 from fastapi import APIRouter, HTTPException
 import logging
+import asyncio
+import base64
+import hashlib
+import json
+import time
 import pandas as pd
-from io import StringIO
+from collections import OrderedDict
+from io import BytesIO
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
 import math
+from typing import Any, Dict, Tuple
 from backend.app.agents.orchestrator_agent import OrchestratorAgent
+from backend.app.utils.file_utils import load_dataset
+
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson_available = False
+
+try:
+    import xxhash
+    xxhash_available = True
+except ImportError:
+    xxhash_available = False
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 orchestrator = OrchestratorAgent()
 
+ORCHESTRATOR_CACHE_VERSION = 1  # bump when decide_next_steps changes, to drop cached results
+ORCHESTRATE_CACHE_MAX_ENTRIES = 64
+ORCHESTRATE_CACHE_TTL_SEC = 600
+
+# Orchestration results keyed by payload fingerprint, with the time they were stored.
+# Only touched from the event loop thread, so it needs no lock.
+_results_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+def payload_fingerprint(data: dict) -> str:
+    """
+    Hash of the request payload (xxh3 when available, BLAKE2 otherwise), prefixed with
+    ORCHESTRATOR_CACHE_VERSION.
+    """
+    if "csv_b64" in data:
+        raw = b"b64:" + data["csv_b64"].encode("ascii")
+    elif "csv_data" in data:
+        raw = b"csv:" + data["csv_data"].encode("utf-8")
+    else:
+        raw = b"json:" + json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+    digest = xxhash.xxh3_64(raw).hexdigest() if xxhash_available else hashlib.blake2b(raw, digest_size=16).hexdigest()
+    return f"v{ORCHESTRATOR_CACHE_VERSION}:{digest}"
+
+def _cached_results(key: str):
+    entry = _results_cache.get(key)
+    if entry is None:
+        return None
+    if time.monotonic() - entry[0] > ORCHESTRATE_CACHE_TTL_SEC:
+        del _results_cache[key]
+        return None
+    _results_cache.move_to_end(key)
+    return entry[1]
+
+def _store_results(key: str, results: Dict[str, Any]) -> None:
+    _results_cache[key] = (time.monotonic(), results)
+    _results_cache.move_to_end(key)
+    while len(_results_cache) > ORCHESTRATE_CACHE_MAX_ENTRIES:
+        _results_cache.popitem(last=False)
+
+def parse_csv_payload(data: dict) -> pd.DataFrame:
+    """
+    Parse the CSV sent in the request body, either as plain text in "csv_data" or
+    base64-encoded in "csv_b64", through load_dataset's Arrow-backed reader.
+    """
+    if "csv_b64" in data:
+        raw = base64.b64decode(data["csv_b64"])
+    else:
+        raw = data["csv_data"].encode("utf-8")
+    return load_dataset(BytesIO(raw))
+
 def convert_nan(obj):
     if isinstance(obj, dict):
         return {k: convert_nan(v) for k, v in obj.items()}
@@ -20,18 +90,40 @@ def convert_nan(obj):
     else:
         return obj
 
+def _results_response(results: Dict[str, Any]):
+    """
+    Serialize orchestrator results with orjson when available, which writes NaN as null
+    and encodes numpy values natively. Falls back to jsonable_encoder plus convert_nan.
+    """
+    if orjson_available:
+        try:
+            return Response(
+                content=orjson.dumps(results, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS),
+                media_type="application/json"
+            )
+        except TypeError:
+            pass
+    return convert_nan(jsonable_encoder(results))
+
 @router.post("/orchestrate")
 async def orchestrate(data: dict):
     try:
-        if "csv_data" in data:
-            csv_str = data["csv_data"]
-            df = pd.read_csv(StringIO(csv_str))
+        # A payload seen within the TTL returns its earlier result without parsing or re-running
+        key = payload_fingerprint(data)
+        results = _cached_results(key)
+        if results is not None:
+            logger.info("Returning cached orchestration result.")
+            return _results_response(results)
+        if "csv_data" in data or "csv_b64" in data:
+            # Parsed in a worker thread so large payloads don't block the event loop
+            df = await asyncio.to_thread(parse_csv_payload, data)
         else:
             df = pd.DataFrame(data)
-        results = orchestrator.decide_next_steps(df)
-        encoded = jsonable_encoder(results)
-        safe_response = convert_nan(encoded)
-        return safe_response
+        results = await asyncio.to_thread(orchestrator.decide_next_steps, df)
+        # Failed runs come back as {"error": ...} and are not cached, so a retry runs again
+        if "error" not in results:
+            _store_results(key, results)
+        return _results_response(results)
     except Exception as e:
         logger.exception("Error during orchestration")
         raise HTTPException(status_code=500, detail=str(e))
@@ -5,7 +5,7 @@ from backend.app.agents.preprocessing_agent import run_preprocessing_pipeline
 router = APIRouter()
 
 @router.post("/preprocess/")
-async def preprocess_data(
+def preprocess_data(
     file: UploadFile = File(...),
     knn_neighbors: int = 3,
     impute_numeric: str = 'knn',
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Form
+import asyncio
 import faiss
 import numpy as np
 from sentence_transformers import SentenceTransformer
@@ -12,19 +13,85 @@ router = APIRouter()
 INDEX_FILE = "data_1/faiss_index.index"
 METADATA_FILE = "data_1/metadata.json"
 DOCS_FOLDER = "data_1/documents"
+HNSW_EF_SEARCH = 64  # candidate list size for HNSW queries; ample for top-k <= 10
+IVF_NPROBE = 16  # inverted lists scanned per query on IVF-PQ indexes
+EMBED_MAX_BATCH = 32  # concurrent queries encoded in one forward pass
+EMBED_MAX_WAIT_MS = 5  # how long the first query in a batch waits for others to join
 
 if not os.path.exists(INDEX_FILE) or not os.path.exists(METADATA_FILE):
     raise FileNotFoundError("FAISS index or metadata file not found. Please run build_index.py first.")
 
 index = faiss.read_index(INDEX_FILE)
+if hasattr(index, "hnsw"):
+    index.hnsw.efSearch = HNSW_EF_SEARCH
+elif hasattr(index, "nprobe"):
+    index.nprobe = IVF_NPROBE
 with open(METADATA_FILE, "r", encoding="utf-8") as f:
     metadata = json.load(f)
 
 model = SentenceTransformer('all-MiniLM-L6-v2')
 
+# Documents are read once at startup instead of on every query; opening directly
+# and skipping missing files saves a separate existence check per document
+doc_cache = {}
+for filename in {meta["filename"] for meta in metadata}:
+    try:
+        with open(os.path.join(DOCS_FOLDER, filename), "r", encoding="utf-8") as f:
+            doc_cache[filename] = f.read()
+    except FileNotFoundError:
+        pass
+
 CHUNK_SIZE = 500
 OVERLAP = 100
 
+_embed_queue: Optional[asyncio.Queue] = None
+_embed_worker: Optional[asyncio.Task] = None
+
+async def _embedding_batcher(queue: asyncio.Queue) -> None:
+    """
+    Collect queries that arrive within EMBED_MAX_WAIT_MS of each other (up to EMBED_MAX_BATCH)
+    and encode them in one call off the event loop, resolving each caller's future with its row.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + EMBED_MAX_WAIT_MS / 1000
+        while len(batch) < EMBED_MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        try:
+            embeddings = await asyncio.to_thread(
+                model.encode, [text for text, _ in batch], batch_size=EMBED_MAX_BATCH,
+                convert_to_numpy=True, normalize_embeddings=True
+            )
+            embeddings = np.asarray(embeddings, dtype="float32")
+            for i, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(embeddings[i:i + 1])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+async def embed_query(query: str) -> np.ndarray:
+    """
+    Embed a single query as a (1, dim) float32 array, batched with other in-flight queries.
+    """
+    global _embed_queue, _embed_worker
+    loop = asyncio.get_running_loop()
+    # The batcher is bound to the running loop, so it is (re)started on first use in each loop
+    if _embed_worker is None or _embed_worker.done() or _embed_worker.get_loop() is not loop:
+        _embed_queue = asyncio.Queue()
+        _embed_worker = loop.create_task(_embedding_batcher(_embed_queue))
+    future = loop.create_future()
+    await _embed_queue.put((query, future))
+    return await future
+
 def get_chunk_text(full_text: str, chunk_idx: int, chunk_size: int = CHUNK_SIZE, overlap: int = OVERLAP) -> str:
     start = max(0, chunk_idx * chunk_size - chunk_idx * overlap)
     end = start + chunk_size
@@ -37,8 +104,7 @@ async def query_summarize(
     enable_cot: bool = Form(False)
 ):
     try:
-        query_embedding = model.encode([query])
-        query_embedding = np.array(query_embedding).astype("float32")
+        query_embedding = await embed_query(query)
         distances, indices = index.search(query_embedding, top_k)
         retrieved_snippets = []
         combined_text = ""
@@ -47,11 +113,13 @@ async def query_summarize(
                 meta = metadata[idx]
                 filename = meta["filename"]
                 c_idx = meta["chunk_idx"]
-                file_path = os.path.join(DOCS_FOLDER, filename)
-                if os.path.exists(file_path):
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        doc_text = f.read()
-                    snippet = get_chunk_text(doc_text, c_idx)
+                doc_text = doc_cache.get(filename)
+                if doc_text is not None:
+                    # Indexes built with chunk offsets slice directly; older metadata recomputes them
+                    if "start" in meta:
+                        snippet = doc_text[meta["start"]:meta["end"]]
+                    else:
+                        snippet = get_chunk_text(doc_text, c_idx)
                     snippet_info = {"filename": filename, "chunk_idx": c_idx, "text": snippet}
                     retrieved_snippets.append(snippet_info)
                     combined_text += f"Snippet from {filename} (chunk {c_idx}):\n{snippet}\n\n"
@@ -59,7 +127,9 @@ async def query_summarize(
                     snippet_info = {"filename": filename, "chunk_idx": c_idx, "text": f"[File not found: {filename}]"}
                     retrieved_snippets.append(snippet_info)
                     combined_text += f"[File not found: {filename}]\n\n"
-        final_answer = generate_ai_insights(
+        # The LLM call blocks, so it runs in a worker thread like the embedding batch
+        final_answer = await asyncio.to_thread(
+            generate_ai_insights,
             eda_summary=combined_text,
             model_summary=f"User query: {query}",
             model_choice="mistral",
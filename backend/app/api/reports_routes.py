@@ -1,9 +1,17 @@
 from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 import os
+import asyncio
 import logging
 import subprocess
 import pandas as pd
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+try:
+    from weasyprint import HTML
+    weasyprint_available = True
+except (ImportError, OSError):  # OSError: Pango/Cairo system libraries are missing
+    weasyprint_available = False
 
 router = APIRouter()
 logging.basicConfig(level=logging.INFO)
@@ -13,6 +21,195 @@ FULL_REPORT_FILENAME = "full_report.html"
 FULL_REPORT_PDF = "full_report.pdf"
 FORECAST_LOG_FILENAME = "forecasting_log.txt"
 AI_INSIGHTS_FILENAME = "ai_insights_report.txt"
+CHROME_PATH = r"C:\Program Files\Google\Chrome\Application\chrome.exe"  # used only without WeasyPrint
+
+# The full report page is streamed as head, one block per section, then foot
+FULL_REPORT_HEAD = """\
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Comprehensive Analysis Report</title>
+    <style>
+        body {
+            font-family: "Open Sans", Arial, sans-serif;
+            background-color: #f9f9f9;
+            margin: 0; padding: 20px; color: #333;
+        }
+        h1 {
+            text-align: center; color: #2c3e50; margin-bottom: 10px;
+        }
+        h2 {
+            color: #34495e; border-bottom: 2px solid #bdc3c7; padding-bottom: 5px;
+        }
+        h3 {
+            color: #2c3e50; margin-top: 20px;
+        }
+        .section {
+            background: #fff; margin: 20px 0; padding: 20px;
+            border-radius: 6px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        }
+        pre {
+            background: #ecf0f1; padding: 10px; border-radius: 4px;
+            overflow-x: auto; white-space: pre-wrap;
+        }
+        table {
+            border-collapse: collapse; width: 100%; margin: 10px 0;
+        }
+        table, th, td {
+            border: 1px solid #ccc;
+        }
+        th, td {
+            padding: 8px; text-align: left;
+        }
+        .executive-summary {
+            background-color: #fff;
+            padding: 10px; margin: 20px 0; border-radius: 6px;
+        }
+        .footer {
+            text-align: center; font-size: 0.9em; color: #7f8c8d; margin-top: 20px;
+        }
+    </style>
+</head>
+<body>
+    <h1>Comprehensive Analysis Report</h1>
+
+    <div class="executive-summary">
+        <h2>Executive Summary</h2>
+        <ul>
+          <li><strong>Data Size:</strong> [Add dynamic info or leave as a placeholder]</li>
+          <li><strong>Best Model Performance:</strong> [Add R^2 or Accuracy details]</li>
+          <li><strong>Major Findings:</strong> [Brief bullet points about your data]</li>
+        </ul>
+    </div>
+
+"""
+SECTION_TEMPLATE = """\
+    <div class="section">
+        <h2>{title}</h2>
+        {content}
+    </div>
+
+"""
+FULL_REPORT_FOOT = """\
+    <div class="footer">
+        <p>Report generated by AI Auto Dashboard</p>
+    </div>
+</body>
+</html>
+"""
+
+# Rendered HTML per source file, keyed by path, with the (mtime_ns, size) it was rendered from
+_SECTION_CACHE: Dict[str, Tuple[int, int, str]] = {}
+
+def _render_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f"<pre>{f.read()}</pre>"
+
+def _render_training_file(path: str) -> str:
+    if path.endswith(".csv"):
+        df = pd.read_csv(path)
+        return "<h3>Training Results (CSV)</h3>" + df.to_html(index=False, justify='left')
+    return _render_text(path) + "<br/>"
+
+def _scan_reports_dir() -> List[os.DirEntry]:
+    with os.scandir(REPORTS_DIR) as it:
+        return sorted((e for e in it if e.is_file()), key=lambda e: e.name)
+
+async def _tee_to_file(chunks: AsyncIterator[str], path: str) -> AsyncIterator[str]:
+    """
+    Pass chunks through while writing them to path, so the report is saved in the same pass
+    that streams it. The file is written under a temporary name and replaced when complete.
+    """
+    tmp_path = f"{path}.tmp"
+    f = await asyncio.to_thread(open, tmp_path, "w", encoding="utf-8")
+    try:
+        async for chunk in chunks:
+            await asyncio.to_thread(f.write, chunk)
+            yield chunk
+    except BaseException:
+        f.close()
+        os.remove(tmp_path)
+        raise
+    f.close()
+    os.replace(tmp_path, path)
+    logging.info(f"Full report generated at {os.path.abspath(path)}")
+
+def _write_pdf(html_path: str, pdf_path: str) -> None:
+    """
+    Render the HTML report to PDF, in-process with WeasyPrint when it is installed,
+    otherwise with a headless Chrome subprocess.
+    """
+    if weasyprint_available:
+        HTML(filename=html_path).write_pdf(pdf_path)
+        return
+    command = [
+        CHROME_PATH,
+        '--headless',
+        '--disable-gpu',
+        f'--print-to-pdf={pdf_path}',
+        html_path
+    ]
+    logging.info(f"Running Chrome command: {' '.join(command)}")
+    subprocess.run(command, check=True)
+
+def _render_section(entry: os.DirEntry, render: Callable[[str], str]) -> str:
+    """
+    Render one report file, reusing the cached HTML while the file's mtime and size are unchanged.
+    The DirEntry's stat comes from the directory scan, so an unchanged file costs no extra I/O.
+    """
+    st = entry.stat()
+    cached = _SECTION_CACHE.get(entry.path)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    logging.info(f"Loading report file: {entry.path}")
+    html = render(entry.path)
+    _SECTION_CACHE[entry.path] = (st.st_mtime_ns, st.st_size, html)
+    return html
+
+async def _report_chunks(dataset_id: str) -> AsyncIterator[str]:
+    """
+    Yield the full report HTML section by section.
+    Every source file is read and rendered concurrently in worker threads, off the event loop;
+    each section is emitted, in page order, as soon as its files are ready.
+    """
+    # One directory scan finds every source file along with its stat
+    entries = await asyncio.to_thread(_scan_reports_dir)
+    by_name = {e.name: e for e in entries}
+    eda_prefix = f"eda_report_{dataset_id}"  # e.g. "eda_report_1234.txt"
+    train_prefix = f"training_results_{dataset_id}"
+    # (title, files, renderer, separator after each file, placeholder when there are none)
+    sections = [
+        ("EDA Report", [e for e in entries if e.name.startswith(eda_prefix)],
+         _render_text, "<br/>", "<p>EDA report: NOT FOUND</p>"),
+        ("Training Report", [e for e in entries if e.name.startswith(train_prefix)],
+         _render_training_file, "", "<p>Training report: NOT FOUND</p>"),
+        ("Forecasting Log", [by_name[FORECAST_LOG_FILENAME]] if FORECAST_LOG_FILENAME in by_name else [],
+         _render_text, "", "<p>Forecasting log: NOT FOUND</p>"),
+        ("AI Insights", [by_name[AI_INSIGHTS_FILENAME]] if AI_INSIGHTS_FILENAME in by_name else [],
+         _render_text, "", "<p>AI insights: NOT FOUND</p>"),
+    ]
+    tasks = [
+        [asyncio.ensure_future(asyncio.to_thread(_render_section, e, render)) for e in files]
+        for _, files, render, _, _ in sections
+    ]
+    try:
+        yield FULL_REPORT_HEAD
+        for (title, files, _, separator, not_found), section_tasks in zip(sections, tasks):
+            if files:
+                content = "".join([await task + separator for task in section_tasks])
+            else:
+                content = not_found
+            yield SECTION_TEMPLATE.format(title=title, content=content)
+        # RAG Summary placeholder (if you have a file, load it, else placeholder)
+        yield SECTION_TEMPLATE.format(
+            title="RAG Summary",
+            content="<p>RAG summary: Not provided. Please run a RAG query if needed.</p>"
+        )
+        yield FULL_REPORT_FOOT
+    finally:
+        for task in (t for section_tasks in tasks for t in section_tasks):
+            task.cancel()
 
 @router.post("/generate-full")
 async def generate_full_report(
@@ -31,162 +228,9 @@ async def generate_full_report(
         if not os.path.exists(REPORTS_DIR):
             raise HTTPException(status_code=404, detail="Reports directory not found.")
 
-        # --- EDA file ---
-        eda_prefix = f"eda_report_{dataset_id}"  # e.g. "eda_report_1234.txt"
-        eda_files = [f for f in os.listdir(REPORTS_DIR) if f.startswith(eda_prefix)]
-        if eda_files:
-            eda_content = ""
-            for file in eda_files:
-                file_path = os.path.join(REPORTS_DIR, file)
-                logging.info(f"Loading EDA file: {file_path}")
-                with open(file_path, "r", encoding="utf-8") as f:
-                    text = f.read()
-                # wrap EDA in <pre> (or parse further if you want)
-                eda_content += f"<pre>{text}</pre><br/>"
-        else:
-            eda_content = "<p>EDA report: NOT FOUND</p>"
-
-        # --- Training file ---
-        train_prefix = f"training_results_{dataset_id}"
-        train_files = [f for f in os.listdir(REPORTS_DIR) if f.startswith(train_prefix)]
-        if train_files:
-            training_content = ""
-            for file in train_files:
-                file_path = os.path.join(REPORTS_DIR, file)
-                logging.info(f"Loading Training file: {file_path}")
-
-                if file.endswith(".csv"):
-                    df = pd.read_csv(file_path)
-                    training_content += "<h3>Training Results (CSV)</h3>"
-                    training_content += df.to_html(index=False, justify='left')
-                else:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        txt = f.read()
-                    training_content += f"<pre>{txt}</pre><br/>"
-        else:
-            training_content = "<p>Training report: NOT FOUND</p>"
-
-        # --- Forecast log ---
-        forecast_log_path = os.path.join(REPORTS_DIR, FORECAST_LOG_FILENAME)
-        if os.path.exists(forecast_log_path):
-            with open(forecast_log_path, "r", encoding="utf-8") as f:
-                forecast_log_content = f"<pre>{f.read()}</pre>"
-        else:
-            forecast_log_content = "<p>Forecasting log: NOT FOUND</p>"
-
-        # --- AI Insights ---
-        ai_insights_path = os.path.join(REPORTS_DIR, AI_INSIGHTS_FILENAME)
-        if os.path.exists(ai_insights_path):
-            with open(ai_insights_path, "r", encoding="utf-8") as f:
-                ai_insights_content = f"<pre>{f.read()}</pre>"
-        else:
-            ai_insights_content = "<p>AI insights: NOT FOUND</p>"
-
-        # --- RAG Summary placeholder (if you have a file, load it, else placeholder)
-        rag_summary_content = "<p>RAG summary: Not provided. Please run a RAG query if needed.</p>"
-
-        # --- Optional: Executive Summary
-        executive_summary = """
-        <ul>
-          <li><strong>Data Size:</strong> [Add dynamic info or leave as a placeholder]</li>
-          <li><strong>Best Model Performance:</strong> [Add R^2 or Accuracy details]</li>
-          <li><strong>Major Findings:</strong> [Brief bullet points about your data]</li>
-        </ul>
-        """
-
-        # --- Final HTML ---
-        full_report_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <title>Comprehensive Analysis Report</title>
-            <style>
-                body {{
-                    font-family: "Open Sans", Arial, sans-serif;
-                    background-color: #f9f9f9;
-                    margin: 0; padding: 20px; color: #333;
-                }}
-                h1 {{
-                    text-align: center; color: #2c3e50; margin-bottom: 10px;
-                }}
-                h2 {{
-                    color: #34495e; border-bottom: 2px solid #bdc3c7; padding-bottom: 5px;
-                }}
-                h3 {{
-                    color: #2c3e50; margin-top: 20px;
-                }}
-                .section {{
-                    background: #fff; margin: 20px 0; padding: 20px;
-                    border-radius: 6px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                }}
-                pre {{
-                    background: #ecf0f1; padding: 10px; border-radius: 4px;
-                    overflow-x: auto; white-space: pre-wrap;
-                }}
-                table {{
-                    border-collapse: collapse; width: 100%; margin: 10px 0;
-                }}
-                table, th, td {{
-                    border: 1px solid #ccc;
-                }}
-                th, td {{
-                    padding: 8px; text-align: left;
-                }}
-                .executive-summary {{
-                    background-color: #fff;
-                    padding: 10px; margin: 20px 0; border-radius: 6px;
-                }}
-                .footer {{
-                    text-align: center; font-size: 0.9em; color: #7f8c8d; margin-top: 20px;
-                }}
-            </style>
-        </head>
-        <body>
-            <h1>Comprehensive Analysis Report</h1>
-
-            <div class="executive-summary">
-                <h2>Executive Summary</h2>
-                {executive_summary}
-            </div>
-
-            <div class="section">
-                <h2>EDA Report</h2>
-                {eda_content}
-            </div>
-
-            <div class="section">
-                <h2>Training Report</h2>
-                {training_content}
-            </div>
-
-            <div class="section">
-                <h2>Forecasting Log</h2>
-                {forecast_log_content}
-            </div>
-
-            <div class="section">
-                <h2>AI Insights</h2>
-                {ai_insights_content}
-            </div>
-
-            <div class="section">
-                <h2>RAG Summary</h2>
-                {rag_summary_content}
-            </div>
-
-            <div class="footer">
-                <p>Report generated by AI Auto Dashboard</p>
-            </div>
-        </body>
-        </html>
-        """
-
         full_report_path = os.path.join(REPORTS_DIR, FULL_REPORT_FILENAME)
-        with open(full_report_path, "w", encoding="utf-8") as f:
-            f.write(full_report_content)
-
-        logging.info(f"Full report generated at {os.path.abspath(full_report_path)}")
+        async for _ in _tee_to_file(_report_chunks(dataset_id), full_report_path):
+            pass
         return {"status": "success", "message": "Full report generated successfully."}
 
     except Exception as e:
@@ -195,11 +239,23 @@ async def generate_full_report(
 
 
 @router.get("/view-full")
-async def view_full_report():
+async def view_full_report(
+    dataset_id: Optional[str] = Query(None, description="Build the report for this dataset while streaming it")
+):
     """
     Return the full HTML report inline for preview.
+    With a dataset_id the report is generated on the fly and streamed section by section
+    (and saved, as /generate-full does); otherwise the last generated report is served.
     """
     full_report_path = os.path.join(REPORTS_DIR, FULL_REPORT_FILENAME)
+    if dataset_id:
+        if not os.path.exists(REPORTS_DIR):
+            raise HTTPException(status_code=404, detail="Reports directory not found.")
+        return StreamingResponse(
+            _tee_to_file(_report_chunks(dataset_id), full_report_path),
+            media_type="text/html",
+            headers={"Content-Disposition": "inline"}
+        )
     if not os.path.exists(full_report_path):
         raise HTTPException(status_code=404, detail="Full report not found. Please generate it first.")
     return FileResponse(
@@ -213,28 +269,23 @@ async def view_full_report():
 @router.get("/download-full")
 async def download_full_report():
     """
-    Convert the generated HTML report to PDF using Chrome headless mode, then return it.
+    Convert the generated HTML report to PDF, then return it.
+    A PDF newer than the HTML report is returned as is, without rendering again.
     """
     full_report_path = os.path.join(REPORTS_DIR, FULL_REPORT_FILENAME)
     if not os.path.exists(full_report_path):
         raise HTTPException(status_code=404, detail="Full report not found. Please generate it first.")
 
     try:
-        # Path to your Chrome or Chrome-based browser
-        chrome_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-
         pdf_output_path = os.path.abspath(os.path.join(REPORTS_DIR, FULL_REPORT_PDF))
         os.makedirs(os.path.dirname(pdf_output_path), exist_ok=True)
 
-        command = [
-            chrome_path,
-            '--headless',
-            '--disable-gpu',
-            f'--print-to-pdf={pdf_output_path}',
-            os.path.abspath(full_report_path)
-        ]
-        logging.info(f"Running Chrome command: {' '.join(command)}")
-        subprocess.run(command, check=True)
+        html_mtime = os.stat(full_report_path).st_mtime_ns
+        if not os.path.exists(pdf_output_path) or os.stat(pdf_output_path).st_mtime_ns < html_mtime:
+            # Rendering blocks, so it runs in a worker thread rather than on the event loop
+            await asyncio.to_thread(_write_pdf, os.path.abspath(full_report_path), pdf_output_path)
+        else:
+            logging.info("Full report PDF is up to date; skipping conversion.")
 
         if not os.path.exists(pdf_output_path):
             raise FileNotFoundError(f"PDF file not created at {pdf_output_path}.")
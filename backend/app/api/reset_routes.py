@@ -7,6 +7,9 @@ import stat
 import logging
 from fastapi import APIRouter, HTTPException
 
+from backend.app.utils.df_cache import clear_df_cache
+from backend.app.api.eda_routes import clear_eda_figures
+
 router = APIRouter()
 logging.basicConfig(level=logging.INFO)
 
@@ -24,7 +27,7 @@ def on_rm_error(func, path, exc_info):
 @router.post("/restart-analysis")
 def restart_analysis():
     """
-    Clears all saved models (and optionally caches) and returns a new session ID.
+    Clears all saved models, served EDA figures and caches, and returns a new session ID.
     WARNING: This operation is irreversible.
     """
     base_model_dir = "models"
@@ -32,6 +35,8 @@ def restart_analysis():
         if os.path.exists(base_model_dir):
             # Remove the entire models folder using our error handler.
             shutil.rmtree(base_model_dir, onerror=on_rm_error)
+        clear_df_cache()
+        clear_eda_figures()
         # Generate a new session ID using UUID.
         new_session_id = str(uuid.uuid4())
         session_folder = os.path.join(base_model_dir, new_session_id)
@@ -1,6 +1,15 @@
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.staticfiles import StaticFiles
+import os
+
+try:
+    import orjson  # noqa: F401 -- required by ORJSONResponse
+    orjson_available = True
+except ImportError:
+    orjson_available = False
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -25,11 +34,14 @@ from backend.app.api import (
 )
 # Import the new reset routes
 from backend.app.api import reset_routes
+from backend.app.utils.figure_pool import shutdown_figure_pool
 
 app = FastAPI(
     title="AI AutoML Backend",
     description="Serious RAG + Agentic AI pipeline for enterprise ML workflows.",
-    version="1.0.0"
+    version="1.0.0",
+    # Route return values are rendered by orjson's C encoder instead of the stdlib json module
+    default_response_class=ORJSONResponse if orjson_available else JSONResponse
 )
 
 app.add_middleware(
@@ -55,6 +67,13 @@ app.include_router(reports_routes.router, prefix="/reports", tags=["Reports"])
 # Include the new reset endpoint
 app.include_router(reset_routes.router, prefix="/reset", tags=["Reset"])
 
+# EDA plot PNGs referenced by URL from /eda/analysis/ responses
+os.makedirs(eda_routes.EDA_FIGURES_DIR, exist_ok=True)
+app.mount(eda_routes.EDA_FIGURES_URL, StaticFiles(directory=eda_routes.EDA_FIGURES_DIR), name="eda-figures")
+
+# Stop the EDA figure rendering workers with the server
+app.add_event_handler("shutdown", shutdown_figure_pool)
+
 @app.get("/")
 def read_root():
     return {
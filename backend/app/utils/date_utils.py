@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+FORMAT_SNIFF_ROWS = 50  # non-null values checked before committing to the ISO 8601 parser
+
+def parse_datetime(values: pd.Series) -> pd.Series:
+    """
+    Convert a column to datetime64, coercing unparseable values to NaT.
+    If the first non-null values are ISO 8601 the whole column goes through pandas'
+    C ISO parser; otherwise it falls back to pandas' default format inference.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    sample = values.dropna().head(FORMAT_SNIFF_ROWS)
+    if len(sample) > 0 and pd.api.types.is_string_dtype(sample):
+        try:
+            pd.to_datetime(sample, format="ISO8601")
+            return pd.to_datetime(values, format="ISO8601", errors="coerce", cache=True)
+        except (ValueError, TypeError):
+            pass
+    return pd.to_datetime(values, errors="coerce", cache=True)
+
+def dates_from_parts(year: pd.Series, month: pd.Series, day: pd.Series) -> pd.Series:
+    """
+    Build a datetime64 column from year/month/day columns with NumPy calendar arithmetic,
+    without formatting and re-parsing strings. Missing or invalid dates (e.g. 2021-02-30) become NaT.
+    """
+    y = pd.to_numeric(year, errors="coerce").to_numpy(dtype=np.float64)
+    m = pd.to_numeric(month, errors="coerce").to_numpy(dtype=np.float64)
+    d = pd.to_numeric(day, errors="coerce").to_numpy(dtype=np.float64)
+    valid = (
+        (y >= 1678) & (y <= 2261)
+        & (m >= 1) & (m <= 12)
+        & (d >= 1) & (d <= 31)
+        & (y == np.floor(y)) & (m == np.floor(m)) & (d == np.floor(d))
+    )
+    out = np.full(len(y), np.datetime64("NaT"), dtype="datetime64[ns]")
+    yi = y[valid].astype(np.int64)
+    mi = m[valid].astype(np.int64)
+    di = d[valid].astype(np.int64)
+    months = (yi - 1970).astype("datetime64[Y]").astype("datetime64[M]") + (mi - 1).astype("timedelta64[M]")
+    dates = months.astype("datetime64[D]") + (di - 1).astype("timedelta64[D]")
+    # A day past the end of the month rolls into the next month; treat it as invalid
+    in_month = dates.astype("datetime64[M]") == months
+    valid_idx = np.flatnonzero(valid)
+    out[valid_idx[in_month]] = dates[in_month]
+    return pd.Series(out, index=year.index)
@@ -0,0 +1,58 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+import pandas as pd
+
+from .file_utils import load_dataset
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DF_CACHE_MAX_ENTRIES = 16
+DF_CACHE_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB of parsed frames kept in memory
+
+_cache: "OrderedDict[Tuple[str, int, int], Tuple[pd.DataFrame, int]]" = OrderedDict()
+_cache_bytes = 0
+_lock = threading.Lock()
+
+def get_df(path: str, copy: bool = True) -> pd.DataFrame:
+    """
+    Load a stored CSV, reusing the parsed DataFrame while the file is unchanged.
+    Entries are keyed by (path, mtime, size), so a rewritten file is parsed again.
+    Callers get a copy by default so in-place edits never reach the cached frame;
+    pass copy=False only for read-only use.
+    """
+    global _cache_bytes
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+    if entry is None:
+        df = load_dataset(path)
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        with _lock:
+            # Older versions of the same file can never be hit again
+            for stale in [k for k in _cache if k[0] == key[0] and k != key]:
+                _cache_bytes -= _cache.pop(stale)[1]
+            if nbytes <= DF_CACHE_MAX_BYTES and key not in _cache:
+                _cache[key] = (df, nbytes)
+                _cache_bytes += nbytes
+                while len(_cache) > DF_CACHE_MAX_ENTRIES or _cache_bytes > DF_CACHE_MAX_BYTES:
+                    _cache_bytes -= _cache.popitem(last=False)[1][1]
+        entry = (df, nbytes)
+    else:
+        logging.info(f"Using cached DataFrame for {path}.")
+    return entry[0].copy() if copy else entry[0]
+
+def clear_df_cache() -> None:
+    """
+    Drop every cached DataFrame.
+    """
+    global _cache_bytes
+    with _lock:
+        _cache.clear()
+        _cache_bytes = 0
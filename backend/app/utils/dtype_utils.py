@@ -0,0 +1,21 @@
+from typing import List, Tuple
+
+import pandas as pd
+
+def split_columns_by_dtype(df: pd.DataFrame) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Group columns into (numeric, categorical, datetime) in a single pass over df.dtypes.
+    Matches select_dtypes with include=[np.number], ["object", "category"] and ["datetime"].
+    """
+    numeric_cols, cat_cols, datetime_cols = [], [], []
+    for col, dtype in df.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            continue
+        # select_dtypes counts timedelta64 as a number, so it is kept here too
+        if pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_timedelta64_dtype(dtype):
+            numeric_cols.append(col)
+        elif dtype == object or isinstance(dtype, pd.CategoricalDtype):
+            cat_cols.append(col)
+        elif pd.api.types.is_datetime64_dtype(dtype):
+            datetime_cols.append(col)
+    return numeric_cols, cat_cols, datetime_cols
@@ -0,0 +1,48 @@
+import os
+import logging
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+FIGURE_POOL_WORKERS = (os.cpu_count() or 1) - 1  # one core stays with the API process; 0 renders inline
+
+_figure_pool: Optional[ProcessPoolExecutor] = None
+_figure_pool_lock = threading.Lock()
+
+def _init_matplotlib() -> None:
+    """
+    Worker initializer: select the Agg backend and load the font cache once per process.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib import font_manager
+    font_manager.findfont(font_manager.FontProperties())
+
+def get_figure_pool() -> ProcessPoolExecutor:
+    """
+    Long-lived pool that renders PNGs outside the API process, created on first use.
+    forkserver workers start from a clean interpreter rather than a fork of the
+    (multithreaded) server, so it is safe to submit from request threads.
+    """
+    global _figure_pool
+    with _figure_pool_lock:
+        if _figure_pool is None:
+            ctx = mp.get_context("forkserver") if "forkserver" in mp.get_all_start_methods() else None
+            _figure_pool = ProcessPoolExecutor(
+                max_workers=FIGURE_POOL_WORKERS, mp_context=ctx, initializer=_init_matplotlib
+            )
+        return _figure_pool
+
+def shutdown_figure_pool() -> None:
+    """
+    Stop the figure rendering workers (called on app shutdown, or after a worker crash
+    so the next caller gets a fresh pool).
+    """
+    global _figure_pool
+    with _figure_pool_lock:
+        if _figure_pool is not None:
+            _figure_pool.shutdown(wait=False, cancel_futures=True)
+            _figure_pool = None
@@ -1,14 +1,26 @@
 import os
+import json
+import shutil
 import logging
+import numpy as np
 import pandas as pd
 import tempfile
 from datetime import datetime
-from typing import Union
+from typing import Union, List, Dict, Any, Optional, Tuple
+
+try:
+    import pyarrow  # also enables pandas' multithreaded Arrow CSV reader
+    pyarrow_available = True
+except ImportError:
+    pyarrow_available = False
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 FILE_SIZE_THRESHOLD = 25 * 1024 * 1024  # 25 MB
 CHUNK_SIZE = 100000
+COPY_BUFFER_SIZE = 1024 * 1024  # 1 MB buffer when copying uploads to disk
+CSV_BLOCK_CELLS = 5_000_000  # sparse cells densified at a time when writing CSV
+COLUMN_SUMMARY_SUFFIX = ".meta.json"  # sidecar next to a saved CSV, replacing "<name>.csv"
 
 def load_dataset(file: Union[str, object]) -> pd.DataFrame:
     """
@@ -25,21 +37,36 @@ def load_dataset(file: Union[str, object]) -> pd.DataFrame:
             file_size = getattr(file, "size", None)
             file_obj = file
 
-        if file_size is not None and file_size > FILE_SIZE_THRESHOLD:
+        # The Arrow reader parses large files on all cores in one pass, so chunking
+        # is only needed for pandas' single-threaded parser
+        if file_size is not None and file_size > FILE_SIZE_THRESHOLD and not pyarrow_available:
             logging.info(f"Large file detected (size: {file_size} bytes). Using chunked reading...")
             return _chunked_read_csv(file, file_obj)
         else:
-            if file_obj:
-                file_obj.seek(0)
-                df = pd.read_csv(file_obj)
-            else:
-                df = pd.read_csv(file)
+            df = _fast_read_csv(file_obj or file)
             logging.info("Dataset loaded successfully with pandas read_csv.")
             return df
     except Exception as e:
         logging.exception("Unexpected error loading dataset")
         raise
 
+def _fast_read_csv(source: Union[str, object]) -> pd.DataFrame:
+    """
+    Read a CSV with the multithreaded PyArrow engine when it is installed, falling back
+    to pandas' C parser for files the Arrow reader rejects.
+    """
+    is_file_obj = not isinstance(source, str)
+    if pyarrow_available:
+        try:
+            if is_file_obj:
+                source.seek(0)
+            return pd.read_csv(source, engine="pyarrow")
+        except Exception as e:
+            logging.warning(f"PyArrow CSV reader failed ({e}); falling back to the pandas parser.")
+    if is_file_obj:
+        source.seek(0)
+    return pd.read_csv(source)
+
 def _chunked_read_csv(file: Union[str, os.PathLike], file_obj: object = None) -> pd.DataFrame:
     """
     Read a large CSV file in chunks and combine them into a single DataFrame.
@@ -48,8 +75,10 @@ def _chunked_read_csv(file: Union[str, os.PathLike], file_obj: object = None) ->
     try:
         if file_obj:
             file_obj.seek(0)
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp:
-                tmp.write(file_obj.read())
+            # Stream the upload to disk in COPY_BUFFER_SIZE pieces rather than reading it whole
+            mode = "w" if isinstance(file_obj.read(0), str) else "wb"
+            with tempfile.NamedTemporaryFile(mode=mode, delete=False, suffix=".csv") as tmp:
+                shutil.copyfileobj(file_obj, tmp, COPY_BUFFER_SIZE)
                 tmp_path = tmp.name
             try:
                 for chunk in pd.read_csv(tmp_path, chunksize=CHUNK_SIZE):
@@ -66,6 +95,209 @@ def _chunked_read_csv(file: Union[str, os.PathLike], file_obj: object = None) ->
         logging.exception("Error during chunked CSV reading")
         raise
 
+def read_csv_sample(file: Union[str, object], sample_size: int) -> Tuple[pd.DataFrame, int, pd.Series]:
+    """
+    Stream a CSV in chunks and keep only an evenly spaced sample of about sample_size rows,
+    so memory is bounded by the sample rather than the file. Rows are kept at a stride that
+    doubles whenever more than twice sample_size rows are held. Also returns the total row
+    count and per-column missing counts of the whole file.
+    """
+    if not isinstance(file, str):
+        file.seek(0)
+    kept: List[pd.DataFrame] = []
+    kept_rows = 0
+    stride = 1
+    n_rows = 0
+    missing_counts = None
+    # Chunks carry a running RangeIndex, so the index is each row's position in the file
+    for chunk in pd.read_csv(file, chunksize=CHUNK_SIZE):
+        n_rows += len(chunk)
+        counts = chunk.isna().sum()
+        missing_counts = counts if missing_counts is None else missing_counts.add(counts, fill_value=0)
+        part = chunk[chunk.index % stride == 0]
+        kept.append(part)
+        kept_rows += len(part)
+        while kept_rows > 2 * sample_size:
+            stride *= 2
+            kept = [p[p.index % stride == 0] for p in kept]
+            kept_rows = sum(len(p) for p in kept)
+    if not kept:
+        return pd.DataFrame(), 0, pd.Series(dtype="int64")
+    sample = pd.concat(kept)
+    if len(sample) > sample_size:
+        # Evenly spaced over the kept rows, so the end of the file is represented too
+        sample = sample.iloc[np.linspace(0, len(sample) - 1, sample_size).astype(np.int64)]
+    logging.info(f"Sampled {len(sample)} of {n_rows} rows while streaming the CSV.")
+    return sample, n_rows, missing_counts.astype("int64")
+
+def save_raw_copy(file: Union[str, object], dest_path: str) -> str:
+    """
+    Copy the uploaded CSV to dest_path byte for byte, instead of re-serializing
+    the loaded DataFrame with to_csv.
+    """
+    try:
+        if isinstance(file, str):
+            shutil.copyfile(file, dest_path)
+        else:
+            file.seek(0)
+            mode = "w" if isinstance(file.read(0), str) else "wb"
+            with open(dest_path, mode) as out:
+                shutil.copyfileobj(file, out, COPY_BUFFER_SIZE)
+        return dest_path
+    except Exception as e:
+        logging.error(f"Failed to save raw copy to {dest_path}: {e}")
+        raise
+
+def write_csv(df: pd.DataFrame, path: str) -> str:
+    """
+    Write a DataFrame to CSV without an index. Sparse columns are densified a block
+    of rows at a time, which is much faster than to_csv's per-column sparse path and
+    never materialises the whole dense matrix.
+    """
+    sparse_cols = [c for c, dtype in df.dtypes.items() if isinstance(dtype, pd.SparseDtype)]
+    if not sparse_cols:
+        df.to_csv(path, index=False)
+        return path
+    block_rows = max(1, CSV_BLOCK_CELLS // len(sparse_cols))
+    with open(path, "w", newline="") as f:
+        for start in range(0, max(len(df), 1), block_rows):
+            block = df.iloc[start:start + block_rows]
+            dense = pd.DataFrame(
+                block[sparse_cols].sparse.to_coo().toarray(), index=block.index, columns=sparse_cols
+            )
+            block = pd.concat([block.drop(columns=sparse_cols), dense], axis=1)[df.columns]
+            block.to_csv(f, index=False, header=(start == 0))
+    return path
+
+def write_file_atomic(path: str, data: bytes) -> None:
+    """
+    Write data to a temporary file next to path and atomically replace path with it,
+    so a crash mid-write never leaves a truncated file behind.
+    """
+    tmp = tempfile.NamedTemporaryFile("wb", dir=os.path.dirname(path) or ".", suffix=".tmp", delete=False)
+    try:
+        with tmp:
+            tmp.write(data)
+        os.replace(tmp.name, path)
+    except Exception:
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+        raise
+
+def prune_subdirs(parent: str, max_entries: int, max_age_s: Optional[float] = None) -> int:
+    """
+    Remove subdirectories of parent beyond the newest max_entries, and any older than
+    max_age_s seconds. Returns the number removed; a missing parent is a no-op.
+    """
+    if not os.path.isdir(parent):
+        return 0
+    entries = []
+    with os.scandir(parent) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue  # removed concurrently
+    entries.sort(reverse=True)
+    cutoff = datetime.now().timestamp() - max_age_s if max_age_s is not None else None
+    stale = [path for i, (mtime, path) in enumerate(entries)
+             if i >= max_entries or (cutoff is not None and mtime < cutoff)]
+    for path in stale:
+        shutil.rmtree(path, ignore_errors=True)
+    if stale:
+        logging.info(f"Removed {len(stale)} old directories from {parent}")
+    return len(stale)
+
+def frame_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Convert a DataFrame to a list of row dicts with NaN, NaT and inf as None, for JSON responses.
+    With PyArrow the rows are built from the columnar buffers in C, where missing values are
+    already nulls; otherwise (or if a column can't be converted) pandas' to_dict is used.
+    Datetimes become ISO 8601 strings and timedeltas seconds, so every value is a JSON
+    primitive and the records need no further encoding pass.
+    """
+    converted = {}
+    for i, dtype in enumerate(df.dtypes):
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            converted[i] = df.iloc[:, i].map(pd.Timestamp.isoformat, na_action="ignore")
+        elif pd.api.types.is_timedelta64_dtype(dtype):
+            converted[i] = df.iloc[:, i].dt.total_seconds()
+    if converted:
+        df = df.copy(deep=False)
+        for i, values in converted.items():
+            df.isetitem(i, values)
+    # Only float columns can hold inf; find the ones that do instead of scanning the whole frame
+    inf_masks = {}
+    for i, dtype in enumerate(df.dtypes):
+        if pd.api.types.is_float_dtype(dtype):
+            is_inf = np.isinf(df.iloc[:, i].to_numpy(dtype=np.float64, na_value=np.nan))
+            if is_inf.any():
+                inf_masks[i] = is_inf
+    if pyarrow_available:
+        try:
+            table_df = df
+            if inf_masks:
+                table_df = df.copy(deep=False)
+                for i, is_inf in inf_masks.items():
+                    table_df.isetitem(i, df.iloc[:, i].mask(is_inf))
+            return pyarrow.Table.from_pandas(table_df, preserve_index=False).to_pylist()
+        except (pyarrow.ArrowException, TypeError, ValueError) as e:
+            logging.warning(f"Arrow conversion failed ({e}); building records with pandas.")
+    # One masking pass turns NaN, NaT and inf into None
+    valid = df.notna().to_numpy()
+    for i, is_inf in inf_masks.items():
+        valid[:, i] &= ~is_inf
+    return df.astype(object).where(valid, None).to_dict(orient="records")
+
+def summarize_columns(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Column names, per-column null counts and numeric/object column lists for a DataFrame,
+    bucketed as they would be after reading the saved CSV back (datetimes come back as text).
+    """
+    numeric_cols, object_cols = [], []
+    for col, dtype in df.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            continue
+        if pd.api.types.is_numeric_dtype(dtype):
+            numeric_cols.append(col)
+        elif (pd.api.types.is_object_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype)
+              or pd.api.types.is_string_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype)):
+            object_cols.append(col)
+    return {
+        "columns": df.columns.tolist(),
+        "missing_counts": {col: int(n) for col, n in df.isna().sum().items()},
+        "numeric_cols": numeric_cols,
+        "object_cols": object_cols,
+    }
+
+def _column_summary_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + COLUMN_SUMMARY_SUFFIX
+
+def write_column_summary(df: pd.DataFrame, csv_path: str) -> str:
+    """
+    Save summarize_columns(df) as a JSON sidecar of the CSV at csv_path, so column
+    inspection doesn't have to parse the whole file again.
+    """
+    summary_path = _column_summary_path(csv_path)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summarize_columns(df), f)
+    return summary_path
+
+def read_column_summary(csv_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the column summary saved for csv_path, or None if there is none or the
+    CSV has been rewritten since.
+    """
+    summary_path = _column_summary_path(csv_path)
+    try:
+        if os.stat(summary_path).st_mtime_ns < os.stat(csv_path).st_mtime_ns:
+            return None
+        with open(summary_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
 def save_processed_data(df: pd.DataFrame, folder: str = "processed_data") -> str:
     """
     Save a DataFrame to CSV with a timestamp in the specified folder.
@@ -76,6 +308,7 @@ def save_processed_data(df: pd.DataFrame, folder: str = "processed_data") -> str
         file_name = f"processed_{timestamp}.csv"
         file_path = os.path.join(folder, file_name)
         df.to_csv(file_path, index=False)
+        write_column_summary(df, file_path)
         logging.info(f"Processed data saved to {file_path}")
         return file_path
     except Exception as e:
@@ -2,46 +2,100 @@ import os
 import faiss
 import json
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import torch
 from sentence_transformers import SentenceTransformer
 
 DOCUMENTS_DIR = "data_1/documents"
 INDEX_FILE = "data_1/faiss_index.index"
 METADATA_FILE = "data_1/metadata.json"
+HNSW_MIN_CHUNKS = 10000  # below this an exact flat scan is already faster than graph search
+HNSW_M = 32  # graph neighbours per node
+HNSW_EF_CONSTRUCTION = 200
+IVFPQ_MIN_CHUNKS = 200000  # from here vectors are product-quantized; HNSW-SQ costs ~640 bytes per chunk
+IVFPQ_M = 48  # sub-quantizers, i.e. bytes per vector at 8 bits each
+IVFPQ_NBITS = 8
+IVF_NPROBE = 16  # inverted lists scanned per query
+QUANTIZER = faiss.ScalarQuantizer.QT_8bit  # one byte per dimension instead of a float32
+READ_WORKERS = 32  # documents read concurrently; file reads release the GIL
+EMBED_BATCH_SIZE = 256  # chunks per forward pass; the default of 32 underfills a GPU
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
+# Embeddings are computed on the GPU in half precision when one is available
+device = "cuda" if torch.cuda.is_available() else "cpu"
+model = SentenceTransformer('all-MiniLM-L6-v2', device=device)
+if device == "cuda":
+    model.half()
+
+def chunk_spans(text, chunk_size=500, overlap=100):
+    """(start, end) offsets of the overlapping chunks of text."""
+    n = len(text)
+    # Chunk starts are an arithmetic progression, so they come straight from range()
+    return [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size - overlap)]
 
 def chunk_text(text, chunk_size=500, overlap=100):
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunk = text[start:end]
-        chunks.append(chunk.strip())
-        start = end - overlap
-        if start < 0:
-            start = 0
-    return chunks
+    return [text[start:end].strip() for start, end in chunk_spans(text, chunk_size, overlap)]
+
+def read_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+def read_documents(directory=DOCUMENTS_DIR):
+    """(filename, text) for every file in directory, read concurrently in a thread pool."""
+    # scandir's entries carry the file type, so no separate stat per name is needed
+    with os.scandir(directory) as it:
+        entries = [entry for entry in it if entry.is_file()]
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+        texts = pool.map(read_file, [entry.path for entry in entries])
+        return [(entry.name, text) for entry, text in zip(entries, texts)]
 
 def main():
     documents = []
     metadata_list = []
-    for fname in os.listdir(DOCUMENTS_DIR):
-        file_path = os.path.join(DOCUMENTS_DIR, fname)
-        if os.path.isfile(file_path):
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if not content:
-                    continue
-                doc_chunks = chunk_text(content)
-                for i, chunk in enumerate(doc_chunks):
-                    documents.append(chunk)
-                    metadata_list.append({"filename": fname, "chunk_idx": i})
+    for fname, raw in read_documents():
+        content = raw.strip()
+        if not content:
+            continue
+        # Offsets are stored relative to the raw file so retrieval is a plain slice
+        offset = len(raw) - len(raw.lstrip())
+        for i, (start, end) in enumerate(chunk_spans(content)):
+            documents.append(content[start:end].strip())
+            metadata_list.append({
+                "filename": fname,
+                "chunk_idx": i,
+                "start": offset + start,
+                "end": offset + end,
+            })
     if not documents:
         raise ValueError(f"No documents found in {DOCUMENTS_DIR}.")
     print(f"Found {len(documents)} total text chunks. Computing embeddings...")
-    embeddings = model.encode(documents).astype("float32")
+    embeddings = model.encode(
+        documents,
+        batch_size=EMBED_BATCH_SIZE,
+        show_progress_bar=True,
+        convert_to_numpy=True,
+        normalize_embeddings=True
+    ).astype("float32")
     dimension = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dimension)
+    # Embeddings are unit length, so inner product is cosine similarity and ranks exactly
+    # as L2 distance would. Queries stay float32 and are compared against decoded codes.
+    if len(documents) >= IVFPQ_MIN_CHUNKS:
+        # Very large corpora: each vector becomes IVFPQ_M bytes of PQ codes, and a query
+        # only scans the IVF_NPROBE inverted lists nearest to it
+        nlist = min(4 * int(np.sqrt(len(documents))), len(documents) // 39)
+        quantizer = faiss.IndexFlatIP(dimension)
+        index = faiss.IndexIVFPQ(quantizer, dimension, nlist, IVFPQ_M, IVFPQ_NBITS, faiss.METRIC_INNER_PRODUCT)
+        index.nprobe = IVF_NPROBE
+        print(f"Building IVF-PQ index (nlist={nlist}, m={IVFPQ_M}, nprobe={IVF_NPROBE})...")
+    elif len(documents) >= HNSW_MIN_CHUNKS:
+        index = faiss.IndexHNSWSQ(dimension, QUANTIZER, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        print(f"Building HNSW index (M={HNSW_M}, efConstruction={HNSW_EF_CONSTRUCTION})...")
+    else:
+        # Small corpora: an exact scan over 8-bit scalar-quantized vectors
+        index = faiss.IndexScalarQuantizer(dimension, QUANTIZER, faiss.METRIC_INNER_PRODUCT)
+    # Training learns the quantizer: per-dimension value ranges for SQ, coarse centroids
+    # and PQ codebooks for IVF-PQ
+    index.train(embeddings)
     index.add(embeddings)
     faiss.write_index(index, INDEX_FILE)
     with open(METADATA_FILE, "w", encoding="utf-8") as f:
@@ -7,14 +7,25 @@ size_limit = 100 * 1024 * 1024  # 100 MB in bytes
 def bytes_to_mb(size_bytes):
     return round(size_bytes / (1024 * 1024), 2)
 
+def scan(directory):
+    # DirEntry knows its type from the directory listing, and on Windows its stat() is
+    # cached from the listing too, so each file costs at most one stat call
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from scan(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        size = entry.stat(follow_symlinks=False).st_size
+                        if size > size_limit:
+                            yield entry.path, size
+                except OSError:
+                    continue
+    except OSError:
+        return
+
 print("📦 Scanning for files over 100MB...\n")
 
-for root, dirs, files in os.walk(project_dir):
-    for file in files:
-        filepath = os.path.join(root, file)
-        try:
-            size = os.path.getsize(filepath)
-            if size > size_limit:
-                print(f"⚠️ {filepath} — {bytes_to_mb(size)} MB")
-        except OSError:
-            continue
+for filepath, size in scan(project_dir):
+    print(f"⚠️ {filepath} — {bytes_to_mb(size)} MB")
@@ -139,13 +139,18 @@ export default function EDA() {
     );
   };
 
+  // Static plots come back either inline as data URLs or as paths served by the backend
+  const isStaticImage = (figStr) =>
+    figStr.startsWith('data:image/png;base64,') || figStr.startsWith('/static/');
+
   const renderFigure = (figStr, title) => {
     if (!figStr) return null;
-    if (figStr.startsWith('data:image/png;base64,')) {
+    if (isStaticImage(figStr)) {
+      const src = figStr.startsWith('/') ? `${api.defaults.baseURL}${figStr}` : figStr;
       return (
         <Box mb={4}>
           <Text fontWeight="bold" mb={2}>{title}</Text>
-          <img src={figStr} alt={title} style={{ width: '100%' }} />
+          <img src={src} alt={title} style={{ width: '100%' }} />
         </Box>
       );
     } else {
@@ -171,7 +176,7 @@ export default function EDA() {
   const staticPlotKeys = edaResult?.figures
     ? Object.keys(edaResult.figures).filter((key) => {
         const val = edaResult.figures[key];
-        return val.startsWith('data:image/png;base64,');
+        return isStaticImage(val);
       })
     : [];
 
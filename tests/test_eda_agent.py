@@ -31,6 +31,14 @@ def test_sample_df():
     # Check that we get 3 rows
     assert len(sampled) == 3
 
+def test_sample_df_spans_whole_frame():
+    # Between sample_size and 2 * sample_size rows a fixed stride of 1 would keep only the head
+    df = pd.DataFrame({"x": np.arange(150)})
+    sampled = eda_agent.sample_df(df, sample_size=100)
+    assert len(sampled) == 100
+    assert sampled["x"].is_unique
+    assert sampled["x"].iloc[0] == 0 and sampled["x"].iloc[-1] == 149
+
 def test_generate_eda_tables():
     df = create_test_dataframe()
     tables = eda_agent.generate_eda_tables(df, exclude_date_features=False)
@@ -66,6 +74,8 @@ def test_generate_numeric_distribution_plots(tmp_path):
     numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
     for col in numeric_cols:
         assert col in plots
+        # Plots come back already rendered, so nothing has to re-render them
+        assert plots[col].startswith(b"\x89PNG")
         # Check if the file was saved
         file_path = os.path.join(str(save_dir), f"{col}_distribution.png")
         assert os.path.exists(file_path)
@@ -32,6 +32,21 @@ def test_remove_outliers_iqr():
     # The outlier (100) should be removed
     assert 100 not in df_clean["num"].values
 
+def test_outlier_mask_matches_per_column_filtering():
+    # Each column's quartiles come from the rows kept by earlier columns in the plan
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "a": np.r_[rng.normal(0, 1, 200), rng.normal(30, 1, 40)],
+        "b": np.r_[rng.normal(0, 1, 200), rng.normal(8, 1, 40)],
+        "c": rng.normal(0, 1, 240),
+    })
+    df.loc[[3, 7], "c"] = np.nan
+    plan = {"a": 1.5, "b": 1.5, "c": 3.0}
+    expected = df
+    for col, factor in plan.items():
+        expected = fe_agent.remove_outliers_iqr(expected, col, factor=factor)
+    pd.testing.assert_frame_equal(df[fe_agent._outlier_mask(df, plan)], expected)
+
 # --- Test Date Feature Creation ---
 def test_create_date_features():
     df = create_test_df()
@@ -0,0 +1,57 @@
+import pandas as pd
+import numpy as np
+
+# Add project root to sys.path so that the module can be imported
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from backend.app.utils.file_utils import frame_to_records
+
+def test_frame_to_records_returns_primitives():
+    df = pd.DataFrame({
+        "float": [1.5, np.nan, np.inf, -np.inf],
+        "int": [1, 2, 3, 4],
+        "text": ["a", None, "c", np.nan],
+        "flag": [True, False, True, False],
+        "date": pd.to_datetime(["2020-01-01", None, "2020-01-03", "2020-01-04"]),
+        "delta": pd.to_timedelta(["1h", None, "30s", "0s"])
+    })
+    records = frame_to_records(df)
+    assert len(records) == 4
+    for row in records:
+        for value in row.values():
+            assert isinstance(value, (int, float, str, bool, type(None)))
+    # NaN, NaT and inf all come back as None
+    assert records[1] == {"float": None, "int": 2, "text": None, "flag": False, "date": None, "delta": None}
+    assert records[2]["float"] is None and records[3]["float"] is None
+    assert records[0]["date"] == "2020-01-01T00:00:00"
+    assert records[0]["delta"] == 3600.0
+
+def test_read_csv_sample_spans_whole_file(tmp_path):
+    from backend.app.utils import file_utils
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"x": np.arange(250_000), "y": np.where(np.arange(250_000) % 10 == 0, np.nan, 1.0)}).to_csv(path, index=False)
+    sample, n_rows, missing_counts = file_utils.read_csv_sample(str(path), sample_size=100_000)
+    assert n_rows == 250_000
+    assert missing_counts["y"] == 25_000
+    assert len(sample) == 100_000
+    # The tail of the file is represented, not cut off by taking the first sample_size kept rows
+    assert sample["x"].iloc[-1] >= 249_000
+    assert sample["x"].is_monotonic_increasing and sample["x"].is_unique
+
+def test_prune_subdirs_by_count_and_age(tmp_path):
+    import os, time
+    from backend.app.utils.file_utils import prune_subdirs
+    now = time.time()
+    for i in range(5):
+        d = tmp_path / f"d{i}"
+        d.mkdir()
+        (d / "fig.png").write_bytes(b"png")
+        os.utime(d, (now - i * 60, now - i * 60))  # d0 newest, d4 oldest
+    (tmp_path / "keep.txt").write_text("files are left alone")
+    assert prune_subdirs(str(tmp_path), max_entries=3) == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["d0", "d1", "d2", "keep.txt"]
+    assert prune_subdirs(str(tmp_path), max_entries=10, max_age_s=90) == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["d0", "d1", "keep.txt"]
+    assert prune_subdirs(str(tmp_path / "missing"), max_entries=0) == 0
@@ -116,3 +116,57 @@ def test_empty_dataframe():
             selected_models=["LinearRegression"],
             selected_metrics=["RMSE"],
         )
+
+# --- Test Additive Cross-Validation ---
+
+def test_cross_val_score_additive_matches_refit():
+    from sklearn.linear_model import LinearRegression
+    from sklearn.model_selection import cross_val_score
+    df = create_regression_df()
+    X = df[["feature1", "feature2"]].to_numpy()
+    y = df["target"].to_numpy()
+    additive = mt_agent.cross_val_score_additive(LinearRegression(), X, y, cv=3)
+    refit = cross_val_score(LinearRegression(), X, y, scoring="r2", cv=3)
+    np.testing.assert_allclose(additive, refit, rtol=1e-7, atol=1e-9)
+
+# --- Test Models Without Settable Feature Names ---
+
+from sklearn.base import BaseEstimator, RegressorMixin
+
+class ReadOnlyNamesRegressor(RegressorMixin, BaseEstimator):
+    """Mean predictor whose feature_names_in_ is a read-only property, as on XGBoost's estimators."""
+    @property
+    def feature_names_in_(self):
+        raise AttributeError("feature_names_in_ is only defined when fitted on a DataFrame")
+
+    def fit(self, X, y):
+        self.mean_ = float(np.mean(y))
+        return self
+
+    def predict(self, X):
+        return np.full(len(X), self.mean_)
+
+def test_train_one_without_settable_feature_names(tmp_path):
+    from backend.app.agents.evaluation_agent import evaluate_model
+    df = create_regression_df()
+    X = df[["feature1", "feature2"]]
+    y = df["target"]
+    X_arr = np.ascontiguousarray(X.to_numpy(dtype=np.float32))
+    model_folder = str(tmp_path / "models_ro")
+    os.makedirs(model_folder)
+    outcome = mt_agent._train_one(
+        "ReadOnlyNames", ReadOnlyNamesRegressor(), X_arr, y, X_arr[:80], X_arr[80:], y[:80], y[80:],
+        X.columns, "regression", mt_agent.get_metrics("regression"), ["RMSE"],
+        False, 3, False, "grid", 10, model_folder
+    )
+    # The model is trained and saved rather than dropped from the results
+    assert outcome is not None
+    model_name, row, model_filename = outcome
+    model_path = os.path.join(model_folder, model_filename)
+    model = joblib.load(model_path)
+    assert model._training_columns == ["feature1", "feature2"]
+    # Evaluation aligns by the recorded columns, dropping extras and reordering
+    eval_df = df[["feature2", "feature1"]].assign(extra=1.0)
+    results = evaluate_model(eval_df, model_path)
+    assert results["column_info"]["used_columns"] == ["feature1", "feature2"]
+    assert len(results["predictions"]) == len(df)
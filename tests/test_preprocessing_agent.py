@@ -15,6 +15,8 @@ from backend.app.agents.preprocessing_agent import (
     remove_outliers_iqr,
     process_date_columns,
     run_preprocessing_pipeline,
+    load_preprocessing_transformers,
+    apply_preprocessing_transformers,
 )
 
 def test_identify_column_types():
@@ -39,6 +41,22 @@ def test_remove_outliers_iqr():
     # Check that the outlier is removed
     assert 100 not in df_clean['values'].values, "Outlier 100 was not removed."
 
+def test_remove_outliers_iqr_multiple_columns_filters_sequentially():
+    # Later columns' quartiles are taken over the rows kept by earlier ones,
+    # exactly as if the function were called once per column
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'a': np.r_[rng.normal(0, 1, 200), rng.normal(30, 1, 40)],
+        'b': np.r_[rng.normal(0, 1, 200), rng.normal(8, 1, 40)],
+        'c': rng.normal(0, 1, 240),
+    })
+    df.loc[[3, 7], 'c'] = np.nan
+    expected = df
+    for col in ['a', 'b', 'c']:
+        expected = remove_outliers_iqr(expected, col, factor=1.5)
+    result = remove_outliers_iqr(df, ['a', 'b', 'c'], factor=1.5)
+    pd.testing.assert_frame_equal(result, expected)
+
 def test_process_date_columns():
     df = pd.DataFrame({'date': ['2020-01-01', '2020-02-15', '2020-03-10']})
     df_processed = process_date_columns(df.copy(), datetime_features=['date'], drop_original_date_cols=True)
@@ -48,6 +66,15 @@ def test_process_date_columns():
         assert f"date_{suffix}" in df_processed.columns, f"Column 'date_{suffix}' not found."
     assert 'date' not in df_processed.columns, "Original 'date' column was not dropped."
 
+def test_process_date_columns_overwrites_existing_parts():
+    df = pd.DataFrame({'date': ['2020-01-01', '2020-02-15'], 'date_month': ['x', 'y'], 'n': [1, 2]})
+    df_processed = process_date_columns(df.copy(), datetime_features=['date'], drop_original_date_cols=True)
+
+    # An existing part column is overwritten where it stands, never duplicated
+    assert df_processed.columns.is_unique
+    assert df_processed.columns.tolist() == ['date_month', 'n', 'date_year', 'date_day', 'date_dayofweek']
+    assert df_processed['date_month'].tolist() == [1, 2]
+
 def test_run_preprocessing_pipeline():
     # Create temporary CSV file with sample data
     sample_data = """A,B,C,D
@@ -77,3 +104,56 @@ def test_run_preprocessing_pipeline():
         # Cleanup: Remove the temporary file
         os.remove(temp_file_path)
 
+def test_saved_transformers_replay_pipeline():
+    sample_data = """A,B,C,D
+1,apple,2020-01-01,10.5
+2,banana,2020-02-01,20.5
+3,,2020-03-01,30.5
+,orange,2020-04-01,40.5
+"""
+    with tempfile.NamedTemporaryFile(mode="w+", delete=False, suffix=".csv") as temp_file:
+        temp_file.write(sample_data)
+        temp_file_path = temp_file.name
+
+    try:
+        df_processed, final_path, dataset_id, raw_dataset_id = run_preprocessing_pipeline(
+            temp_file_path,
+            impute_numeric="mean",
+            explicit_datetime_cols=["C"]
+        )
+        transformers = load_preprocessing_transformers(dataset_id)
+        df_replayed = apply_preprocessing_transformers(pd.read_csv(temp_file_path), transformers)
+        pd.testing.assert_frame_equal(df_replayed, df_processed, check_dtype=False)
+    finally:
+        os.remove(temp_file_path)
+
+def test_run_preprocessing_pipeline_high_card_one_hot():
+    import warnings
+    from backend.app.utils.file_utils import read_column_summary
+    rows = "\n".join(f"{i},city_{i % 12},{i * 1.5}" for i in range(48))
+    with tempfile.NamedTemporaryFile(mode="w+", delete=False, suffix=".csv") as temp_file:
+        temp_file.write("A,city,D\n" + rows + "\n")
+        temp_file_path = temp_file.name
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", FutureWarning)
+            df_processed, final_path, dataset_id, raw_dataset_id = run_preprocessing_pipeline(
+                temp_file_path,
+                remove_outliers=False,
+                high_card_threshold=5,
+                high_card_option='one-hot'
+            )
+        encoded_cols = [c for c in df_processed.columns if c.startswith("city_")]
+        assert len(encoded_cols) == 11  # drop='first'
+        # The returned frame is dense, so sklearn and the column summary consume it as is
+        assert not any(isinstance(dtype, pd.SparseDtype) for dtype in df_processed.dtypes)
+        assert df_processed[encoded_cols].sum(axis=1).isin([0.0, 1.0]).all()
+        pd.testing.assert_frame_equal(pd.read_csv(final_path), df_processed, check_dtype=False)
+        summary = read_column_summary(final_path)
+        assert set(encoded_cols) <= set(summary["numeric_cols"])
+        transformers = load_preprocessing_transformers(dataset_id)
+        df_replayed = apply_preprocessing_transformers(pd.read_csv(temp_file_path), transformers)
+        pd.testing.assert_frame_equal(df_replayed, df_processed, check_dtype=False)
+    finally:
+        os.remove(temp_file_path)